@@ -0,0 +1,280 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Benchmarks for the bdec decoders and encoders.
+
+Each benchmark is a list of (specification, data) cases. The stages of a
+benchmark (loading the specification, decoding, writing xml, encoding, and
+decoding with a generated C decoder) are each run in their own process, so
+the peak memory of each stage can be measured. See bdec.benchmarks.runner
+for running the benchmarks from the command line.
+"""
+
+import gzip
+import multiprocessing
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+import bdec
+import bdec.compiler as comp
+import bdec.data as dt
+import bdec.output.xmlout as xmlout
+from bdec.spec import load_specs
+
+LOAD = 'load'
+DECODE = 'decode'
+XML = 'xml'
+ENCODE = 'encode'
+C = 'c'
+STAGES = [LOAD, DECODE, XML, ENCODE, C]
+
+_ROOT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_SPECS_DIR = os.path.join(_ROOT_DIR, 'specs')
+_REGRESSION_DIR = os.path.join(_ROOT_DIR, 'regression')
+
+class Benchmark:
+    def __init__(self, name, cases):
+        """Construct a benchmark.
+
+        name -- The name of the benchmark.
+        cases -- A list of (spec filename, main entry name, data filename)
+            tuples. If the main entry name is None, the spec's main entry is
+            used.
+        """
+        self.name = name
+        self.cases = cases
+
+    def __str__(self):
+        return self.name
+
+def _sample(name, data_filename):
+    return Benchmark(name, [(os.path.join(_SPECS_DIR, name + '.xml'), None,
+        os.path.join(_SPECS_DIR, 'test', name, data_filename))])
+
+def _regression(extension):
+    """Create a benchmark for the files that should decode in a regression folder.
+
+    See regression/test.py for the naming of the regression files.
+    """
+    directory = os.path.join(_REGRESSION_DIR, extension)
+    cases = []
+    for filename in sorted(os.listdir(directory)):
+        names = filename.split('.')
+        if len(names) != 3:
+            continue
+        base, main_name = names[0], None
+        if '-' in base:
+            base, main_name = base.split('-')
+        spec_filename = os.path.join(directory, '%s.%s' % (base, extension))
+        cases.append((spec_filename, main_name, os.path.join(directory, filename)))
+    return Benchmark('regression-%s' % extension, cases)
+
+def get_benchmarks():
+    """Return the list of available benchmarks."""
+    result = [_sample('png', 'white.png'), _sample('jpeg', 'smiley.jpg'),
+            _sample('mp3', 'tone.mp3'), _sample('vfat', 'fat12.bin.gz'),
+            _sample('pdf', 'hello.pdf.gz')]
+    for extension in ['xml', 'asn1', 'proto']:
+        if os.path.isdir(os.path.join(_REGRESSION_DIR, extension)):
+            result.append(_regression(extension))
+    return result
+
+
+def _read(filename):
+    if os.path.splitext(filename)[1] == '.gz':
+        return gzip.GzipFile(filename, 'rb').read()
+    return open(filename, 'rb').read()
+
+def _best_time(function, min_time):
+    """Run function until min_time seconds have passed.
+
+    Returns the quickest run time, and the result of the function.
+    """
+    best = None
+    total = 0.0
+    while best is None or total < min_time:
+        start = time.time()
+        result = function()
+        elapsed = time.time() - start
+        total += elapsed
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def _count_entries(items):
+    count = 0
+    for is_starting, name, entry, data, value in items:
+        if not is_starting:
+            count += 1
+    return count
+
+def _run_c(spec, common, data, min_time):
+    """Compile and time a C decoder for the specification.
+
+    Returns the quickest run time, and the peak memory of the decoder. Note
+    that the peak memory includes the memory of the python process that was
+    forked to run the decoder.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        templates = comp.load_templates(comp.BuiltinTemplate('c'))
+        comp.generate_code(spec, templates, directory, common, {})
+        files = [f for f in os.listdir(directory) if f.endswith('.c')]
+        compiler = subprocess.Popen(['gcc', '-O2', '-o', 'decode'] + files,
+                cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = compiler.communicate()[0]
+        if compiler.returncode != 0:
+            raise Exception('Failed to compile C decoder: %s' % output)
+        data_filename = os.path.join(directory, 'data.bin')
+        open(data_filename, 'wb').write(data)
+
+        peak = [0]
+        def decode():
+            null = open(os.devnull, 'wb')
+            process = subprocess.Popen([os.path.join(directory, 'decode'),
+                data_filename], stdout=null)
+            pid, status, usage = os.wait4(process.pid, 0)
+            process.returncode = status
+            peak[0] = max(peak[0], usage.ru_maxrss)
+            if status != 0:
+                raise Exception('C decoder failed with status %i' % status)
+        seconds = _best_time(decode, min_time)[0]
+        return seconds, peak[0]
+    finally:
+        shutil.rmtree(directory)
+
+def _run_case(stage, spec_filename, main_name, data_filename, min_time):
+    """Time a single stage for a benchmark case.
+
+    Returns (seconds, entries, peak memory in KB).
+    """
+    if stage == LOAD:
+        seconds = _best_time(lambda: load_specs([(spec_filename, None, None)],
+            main_name), min_time)[0]
+        return seconds, 0, None
+
+    spec, common, lookup = load_specs([(spec_filename, None, None)], main_name)
+    data = _read(data_filename)
+    entries = _count_entries(spec.decode(dt.Data(data)))
+    if stage == DECODE:
+        seconds = _best_time(lambda: _count_entries(spec.decode(dt.Data(data))),
+                min_time)[0]
+    elif stage == XML:
+        seconds = _best_time(lambda: xmlout.to_string(spec.decode(dt.Data(data))),
+                min_time)[0]
+    elif stage == ENCODE:
+        xml = xmlout.to_string(spec.decode(dt.Data(data)))
+        seconds = _best_time(lambda: xmlout.encode(spec, xml).bytes(),
+                min_time)[0]
+    elif stage == C:
+        seconds, peak = _run_c(spec, common, data, min_time)
+        return seconds, entries, peak
+    else:
+        raise Exception("Unknown benchmark stage '%s'!" % stage)
+    return seconds, entries, None
+
+def _run_stage(benchmark, stage, min_time):
+    """Run a benchmark stage; called in a separate process."""
+    seconds = 0.0
+    entries = 0
+    size = 0
+    peak = None
+    failures = []
+    for spec_filename, main_name, data_filename in benchmark.cases:
+        try:
+            case_seconds, case_entries, case_peak = _run_case(stage,
+                    spec_filename, main_name, data_filename, min_time)
+        except Exception, ex:
+            failures.append('%s: %s' % (data_filename, ex))
+            continue
+        seconds += case_seconds
+        entries += case_entries
+        size += len(_read(data_filename))
+        if case_peak is not None:
+            peak = max(peak, case_peak)
+
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = {'seconds': seconds, 'bytes': size, 'entries': entries,
+            'peak_memory_kb': peak, 'failures': failures}
+    if seconds and stage != LOAD:
+        result['mb_per_sec'] = size / seconds / (1024 * 1024)
+        if entries:
+            result['entries_per_sec'] = entries / seconds
+    return result
+
+def run(benchmarks, stages=STAGES, min_time=0.2, log=None):
+    """Run the benchmarks.
+
+    Returns a dictionary suitable for saving as json, containing the results
+    of each stage of each benchmark.
+
+    benchmarks -- A list of Benchmark instances to run.
+    stages -- The stages to run for each benchmark.
+    min_time -- The minimum time in seconds to spend timing each case. The
+        quickest run of the case is used.
+    log -- A callable to report progress to. If None, nothing is reported.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        results[benchmark.name] = {}
+        for stage in stages:
+            if log:
+                log('%s %s' % (benchmark.name, stage))
+            # Each stage is run in a new process, so the peak memory usage
+            # is for that stage alone.
+            pool = multiprocessing.Pool(1)
+            try:
+                result = pool.apply(_run_stage, (benchmark, stage, min_time))
+            finally:
+                pool.terminate()
+                pool.join()
+            results[benchmark.name][stage] = result
+    return {'version': bdec.__version__, 'benchmarks': results}
+
+def compare(results, baseline, threshold=0.1):
+    """Compare the results of a benchmark run against a baseline.
+
+    Returns a list of (benchmark, stage, measure, baseline value, value)
+    tuples. The measure is 'seconds' for stages that were more than
+    'threshold' slower than the baseline (where 0.1 is 10% slower), and
+    'failures' (with the number of failures) for stages where a different
+    number of files failed than in the baseline. A stage that fails more
+    often may also run faster, as the failed files aren't timed in full.
+    Stages missing from either run are ignored.
+    """
+    regressions = []
+    for name, stages in sorted(results['benchmarks'].items()):
+        for stage, result in sorted(stages.items()):
+            try:
+                expected = baseline['benchmarks'][name][stage]
+            except KeyError:
+                continue
+            failures = len(result['failures'])
+            expected_failures = len(expected['failures'])
+            if failures != expected_failures:
+                regressions.append((name, stage, 'failures', expected_failures, failures))
+            if expected['seconds'] and \
+                    result['seconds'] > expected['seconds'] * (1 + threshold):
+                regressions.append((name, stage, 'seconds', expected['seconds'], result['seconds']))
+    return regressions
@@ -0,0 +1,326 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Generate large binary files for benchmarking.
+
+A sample file is decoded, and the longest list of repeated entries (such as
+the chunks of a png, or the frames of an mp3) is extended with copies of its
+items until the file reaches the requested size. Field values in the copies
+can be randomised using value distributions; a fixed random seed makes the
+output reproducible. The file is created by the encoder, so the output is
+valid for the specification (assuming the specification can encode).
+"""
+
+from optparse import OptionParser
+import gzip
+import random
+import sys
+
+import bdec
+import bdec.data as dt
+from bdec.choice import Choice
+from bdec.entry import is_hidden
+from bdec.field import Field
+import bdec.output.instance as instance
+from bdec.sequence import Sequence
+from bdec.sequenceof import SequenceOf
+from bdec.spec import load_specs
+
+class NoRepeatedEntriesError(bdec.DecodeError):
+    """The sample doesn't have any repeated entries that can be extended."""
+    def __str__(self):
+        return "%s has no repeated entries in the sample data!" % self.entry
+
+class Uniform:
+    """Random integers between min and max (inclusive)."""
+    def __init__(self, min, max):
+        self.min = min
+        self.max = max
+
+    def __call__(self, rng):
+        return rng.randint(self.min, self.max)
+
+class OneOf:
+    """Random items from a list of values."""
+    def __init__(self, values):
+        self.values = values
+
+    def __call__(self, rng):
+        return rng.choice(self.values)
+
+
+class _Sequence(dict):
+    """The value of a sequence with both children and a value."""
+    def __init__(self, value, children):
+        dict.__init__(self, children)
+        self.value = value
+
+    def __int__(self):
+        return int(self.value)
+
+def _is_match(path, name):
+    """Does a dotted name match the end of a path."""
+    names = name.split('.')
+    return path[-len(names):] == names
+
+class _Copier:
+    """Copies decoded instances, replacing values using the distributions.
+
+    The lists of the copied instances are recorded, so they can later be
+    extended.
+    """
+    def __init__(self, distributions, rng):
+        self._distributions = distributions
+        self._rng = rng
+        # A list of (copied list, decoded list, sequenceof, path) tuples.
+        self.lists = []
+
+    def copy(self, entry, value, path):
+        path = path + [entry.name]
+        if isinstance(entry, Field):
+            for name, distribution in self._distributions:
+                if _is_match(path, name):
+                    return distribution(self._rng)
+            return value
+        elif isinstance(entry, SequenceOf):
+            result = _Items(self.copy(entry.children[0].entry, item, path) for item in value)
+            self.lists.append((result, value, entry, path))
+            return result
+        elif isinstance(entry, Choice):
+            for child in entry.children:
+                try:
+                    option = getattr(value, instance.escape(child.name))
+                except AttributeError:
+                    continue
+                return {child.name: self.copy(child.entry, option, path)}
+            return value
+        elif isinstance(entry, Sequence):
+            children = {}
+            for child in entry.children:
+                if is_hidden(child.name):
+                    continue
+                try:
+                    child_value = getattr(value, instance.escape(child.name))
+                except AttributeError:
+                    # Sequences without visible children are decoded to
+                    # their value.
+                    return value
+                children[child.name] = self.copy(child.entry, child_value, path)
+            if entry.value is not None:
+                return _Sequence(int(value), children)
+            return children
+        return value
+
+class _Items(list):
+    """A copied list, which can be extended with generated items.
+
+    The generated items are created as the list is iterated (so the whole
+    file isn't held in memory), and are inserted before the last item.
+    """
+    def __init__(self, items):
+        list.__init__(self, items)
+        self.generated = None
+
+    def __iter__(self):
+        if self.generated is None:
+            return list.__iter__(self)
+        return self._iter_extended()
+
+    def _iter_extended(self):
+        for item in self[:-1]:
+            yield item
+        for item in self.generated():
+            yield item
+        if self:
+            yield self[-1]
+
+def _generate_items(item, originals, path, count, distributions, seed):
+    """Copy randomly chosen original items.
+
+    The same seed always generates the same items, so the items can be
+    generated again if the list is iterated again (eg: by a choice).
+    """
+    rng = random.Random(seed)
+    copier = _Copier(distributions, rng)
+    for i in xrange(count):
+        yield copier.copy(item, rng.choice(originals), path)
+        # The lists in the copies won't be extended.
+        del copier.lists[:]
+
+def _write(items, output):
+    """Write encoded data objects (which may not be whole bytes) to a file.
+
+    Returns the number of bytes written.
+    """
+    # Data objects that don't end on a byte boundary are joined to the
+    # following data objects until they do.
+    pending = []
+    pending_bits = 0
+    buffer = []
+    buffered = 0
+    size = 0
+    for data in items:
+        if not pending and len(data) % 8 == 0:
+            bytes = data.bytes()
+        else:
+            pending.append(data)
+            pending_bits += len(data)
+            if pending_bits % 8:
+                continue
+            bytes = dt.Data.join(pending).bytes()
+            pending = []
+            pending_bits = 0
+        buffer.append(bytes)
+        buffered += len(bytes)
+        if buffered > 1024 * 1024:
+            output.write(''.join(buffer))
+            size += buffered
+            buffer = []
+            buffered = 0
+    buffer.append(dt.Data.join(pending).bytes())
+    output.write(''.join(buffer))
+    return size + buffered + len(buffer[-1])
+
+def generate(spec, sample, size, output, distributions=[], seed=0, repeat=None):
+    """Generate a binary file using the specification.
+
+    Returns the size of the generated file in bytes.
+
+    spec -- The entry to encode with.
+    sample -- The sample data to decode (as a string).
+    size -- The target size for the generated file in bytes.
+    output -- The file object to write the generated data to.
+    distributions -- A list of (name, distribution) tuples, where the name is
+      a dotted list of the entry names at the end of the path to a field, and
+      the distribution is a callable that takes a random.Random instance and
+      returns a value for the field (see Uniform and OneOf).
+    seed -- The seed for the random number generator.
+    repeat -- The dotted name of the repeated entry to extend. If None, the
+      outermost repeated entry is extended.
+    """
+    rng = random.Random(seed)
+    copier = _Copier(distributions, rng)
+    value = copier.copy(spec, instance.decode(spec, dt.Data(sample)), [])
+
+    # Extend the outermost list (choosing the longest if there are several
+    # at the same depth). Inner lists often have their length encoded in
+    # visible fields (which the encoder will not update).
+    lists = [l for l in copier.lists if l[1] and
+            (repeat is None or _is_match(l[3], repeat))]
+    if not lists:
+        raise NoRepeatedEntriesError(spec)
+    copied, decoded, entry, path = max(lists,
+            key=lambda (c, d, e, p): (-len(p), len(d)))
+
+    # Estimate the number of items needed from the size of the sample, and
+    # the size of the sample with only the last item. The last item is kept
+    # at the end, as it may be the item that ends the list.
+    sample_size = len(instance.encode(spec, value)) / 8
+    item_size = sample_size / len(decoded)
+    if len(decoded) > 1:
+        items = copied[:]
+        copied[:-1] = []
+        try:
+            item_size = (sample_size - len(instance.encode(spec, value)) / 8) / \
+                    float(len(decoded) - 1)
+        except bdec.DecodeError:
+            pass
+        copied[:] = items
+    needed = max(len(decoded), int(size / max(item_size, 1)))
+    originals = decoded[:-1] or decoded
+    item = entry.children[0].entry
+    item_seed = rng.random()
+    copied.generated = lambda: _generate_items(item, originals, path,
+            needed - len(decoded), distributions, item_seed)
+    return _write(instance.iter_encode(spec, value), output)
+
+def _parse_distribution(text):
+    """Parse 'name=min:max' or 'name=a,b,c' into a (name, distribution)."""
+    name, values = text.split('=', 1)
+    if ':' in values:
+        min, max = values.split(':')
+        return name, Uniform(int(min), int(max))
+    values = values.split(',')
+    try:
+        values = [int(v) for v in values]
+    except ValueError:
+        values = [unicode(v) for v in values]
+    return name, OneOf(values)
+
+__doc__ = '''%s [options] <spec> <sample> <size>
+Generate a binary file of roughly <size> bytes by extending the repeated
+entries of a sample file. The size can have a K, M or G suffix.''' % sys.argv[0]
+
+def _parse_size(text):
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    multiplier = multipliers.get(text[-1:].upper())
+    if multiplier is not None:
+        return int(float(text[:-1]) * multiplier)
+    return int(text)
+
+def main():
+    parser = OptionParser(usage=__doc__)
+    parser.add_option('-o', dest='output', help='Write the generated data to '
+            'FILENAME instead of stdout.', metavar='FILENAME')
+    parser.add_option('--main', dest='main', help='Specify the entry to '
+            'be used instead of the toplevel protocol object.',
+            metavar='ENTRY')
+    parser.add_option('--repeat', dest='repeat', help='The dotted name of '
+            'the sequenceof to extend (by default the outermost sequenceof '
+            'in the sample is extended).', metavar='NAME')
+    parser.add_option('--seed', dest='seed', type='int', default=0,
+            help='The seed for the random number generator (default 0).')
+    parser.add_option('--value', dest='values', action='append', default=[],
+            help="Randomise the values of a field. VALUE is either "
+            "'<name>=<min>:<max>' for a uniform distribution, or "
+            "'<name>=<a>,<b>,...' to choose from a list of values; <name> "
+            "is the end of the dotted path to the field.", metavar='VALUE')
+    options, args = parser.parse_args()
+    if len(args) != 3:
+        sys.exit("Expected a spec, sample and size! See '%s -h' for more info." % sys.argv[0])
+    spec_filename, sample_filename, size = args
+
+    try:
+        spec, common, lookup = load_specs([(spec_filename, None, None)], options.main)
+    except bdec.spec.LoadError, ex:
+        sys.exit(str(ex))
+    try:
+        distributions = [_parse_distribution(v) for v in options.values]
+        size = _parse_size(size)
+    except ValueError, ex:
+        sys.exit('Invalid option; %s' % ex)
+    if sample_filename.endswith('.gz'):
+        sample = gzip.GzipFile(sample_filename, 'rb').read()
+    else:
+        sample = open(sample_filename, 'rb').read()
+
+    output = sys.stdout
+    if options.output:
+        output = open(options.output, 'wb')
+    try:
+        generate(spec, sample, size, output, distributions, options.seed,
+                options.repeat)
+    except bdec.DecodeError, ex:
+        sys.exit(str(ex))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+from optparse import OptionParser
+import json
+import sys
+
+import bdec.benchmarks as bench
+
+__doc__ = '''%s [options] [benchmark]...
+Run the bdec benchmarks, writing the results as json. If no benchmarks are
+listed, all benchmarks are run.''' % sys.argv[0]
+
+def _log(message):
+    sys.stderr.write(message + '\n')
+
+def main():
+    parser = OptionParser(usage=__doc__)
+    parser.add_option('-o', dest='output', help='Write the json results to '
+            'FILENAME instead of stdout.', metavar='FILENAME')
+    parser.add_option('--baseline', dest='baseline', help='Compare the '
+            'results against the json results in FILENAME, failing if any '
+            'stage is slower than the threshold, or has a different number of '
+            'failures.', metavar='FILENAME')
+    parser.add_option('--threshold', dest='threshold', type='float',
+            default=0.1, help='The fraction a stage can be slower than the '
+            'baseline before it is reported as a regression (default 0.1).')
+    parser.add_option('--stages', dest='stages', default=','.join(bench.STAGES),
+            help='A comma separated list of the stages to run (default %s).'
+            % ','.join(bench.STAGES))
+    parser.add_option('--min-time', dest='min_time', type='float', default=0.2,
+            help='The minimum number of seconds to spend timing each case '
+            '(default 0.2).')
+    parser.add_option('-l', dest='list', action='store_true',
+            help='List the available benchmarks.')
+    options, args = parser.parse_args()
+
+    benchmarks = bench.get_benchmarks()
+    if options.list:
+        for benchmark in benchmarks:
+            print benchmark.name
+        return
+
+    if args:
+        names = dict((b.name, b) for b in benchmarks)
+        try:
+            benchmarks = [names[name] for name in args]
+        except KeyError, ex:
+            sys.exit("Unknown benchmark %s! See '%s -l'." % (ex, sys.argv[0]))
+    stages = options.stages.split(',')
+    for stage in stages:
+        if stage not in bench.STAGES:
+            sys.exit("Unknown stage '%s'!" % stage)
+
+    results = bench.run(benchmarks, stages, options.min_time, _log)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if options.output:
+        open(options.output, 'w').write(text + '\n')
+    else:
+        print text
+
+    if options.baseline:
+        baseline = json.load(open(options.baseline, 'r'))
+        regressions = bench.compare(results, baseline, options.threshold)
+        for name, stage, measure, expected, actual in regressions:
+            if measure == 'failures':
+                _log('%s %s: %i failures (baseline %i)' % (name, stage, actual, expected))
+            else:
+                _log('%s %s: %.4fs (baseline %.4fs)' % (name, stage, actual, expected))
+        if regressions:
+            sys.exit('Found %i regressions from the baseline!' % len(regressions))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import bdec.benchmarks as bench
+
+def _results(failures=[], **stages):
+    return {'benchmarks': {'png': dict((stage, {'seconds': seconds,
+        'failures': failures}) for stage, seconds in stages.items())}}
+
+class TestBenchmarks(unittest.TestCase):
+    def test_get_benchmarks(self):
+        names = [b.name for b in bench.get_benchmarks()]
+        for name in ['png', 'jpeg', 'mp3', 'vfat', 'pdf', 'regression-xml']:
+            self.assertTrue(name in names, name)
+
+    def test_run(self):
+        png = [b for b in bench.get_benchmarks() if b.name == 'png']
+        results = bench.run(png, [bench.DECODE], 0)
+        result = results['benchmarks']['png']['decode']
+        self.assertEqual([], result['failures'])
+        self.assertEqual(137, result['bytes'])
+        self.assertTrue(result['entries'] > 0)
+        self.assertTrue(result['mb_per_sec'] > 0)
+        self.assertTrue(result['peak_memory_kb'] > 0)
+
+    def test_compare(self):
+        baseline = _results(decode=1.0, xml=2.0)
+        self.assertEqual([], bench.compare(_results(decode=1.05, xml=1.0), baseline))
+        self.assertEqual([('png', 'decode', 'seconds', 1.0, 1.2)],
+                bench.compare(_results(decode=1.2, xml=2.0), baseline))
+        self.assertEqual([], bench.compare(_results(decode=1.2), baseline, 0.5))
+
+    def test_compare_failures(self):
+        # A stage that starts failing is reported, even though it's faster.
+        baseline = _results(decode=1.0)
+        self.assertEqual([('png', 'decode', 'failures', 0, 1)],
+                bench.compare(_results(['a.png: failed'], decode=0.5), baseline))
+        self.assertEqual([('png', 'decode', 'failures', 0, 1),
+            ('png', 'decode', 'seconds', 1.0, 2.0)],
+            bench.compare(_results(['a.png: failed'], decode=2.0), baseline))
+
+    def test_compare_ignores_missing_stages(self):
+        self.assertEqual([], bench.compare(_results(encode=5.0),
+            _results(decode=1.0)))
@@ -0,0 +1,82 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import os.path
+import StringIO
+import unittest
+
+import bdec.data as dt
+from bdec.benchmarks.generate import generate, NoRepeatedEntriesError, \
+        OneOf, Uniform
+from bdec.expression import parse
+from bdec.field import Field
+import bdec.output.instance as instance
+from bdec.sequence import Sequence
+from bdec.sequenceof import SequenceOf
+from bdec.spec import load_specs
+
+def _spec():
+    record = Sequence('record', [Field('a', 8, format=Field.INTEGER),
+        Field('b', 8, format=Field.INTEGER)])
+    records = SequenceOf('records', record, None)
+    return Sequence('file', [Field('header', 16, format=Field.INTEGER), records])
+
+class TestGenerate(unittest.TestCase):
+    def _generate(self, spec, sample, size, *args, **kwargs):
+        output = StringIO.StringIO()
+        written = generate(spec, sample, size, output, *args, **kwargs)
+        self.assertEqual(written, len(output.getvalue()))
+        return output.getvalue()
+
+    def test_extend_records(self):
+        data = self._generate(_spec(), '\x00\x07\x01\x02\x03\x04', 1000)
+        self.assertTrue(1000 <= len(data) <= 1002)
+        value = instance.decode(_spec(), dt.Data(data))
+        self.assertEqual(7, value.header)
+        self.assertEqual((len(data) - 2) / 2, len(value.records))
+        # The last record is kept at the end.
+        self.assertEqual((3, 4), (value.records[-1].a, value.records[-1].b))
+
+    def test_distributions(self):
+        distributions = [('record.a', Uniform(10, 20)), ('b', OneOf([5, 6]))]
+        data = self._generate(_spec(), '\x00\x07\x01\x02', 100, distributions)
+        value = instance.decode(_spec(), dt.Data(data))
+        for record in value.records:
+            self.assertTrue(10 <= record.a <= 20)
+            self.assertTrue(record.b in [5, 6])
+        self.assertEqual(7, value.header)
+
+    def test_seed(self):
+        distributions = [('a', Uniform(0, 255))]
+        first = self._generate(_spec(), '\x00\x07\x01\x02', 100, distributions, 1)
+        self.assertEqual(first, self._generate(_spec(), '\x00\x07\x01\x02', 100, distributions, 1))
+        self.assertNotEqual(first, self._generate(_spec(), '\x00\x07\x01\x02', 100, distributions, 2))
+
+    def test_no_repeated_entries(self):
+        spec = Sequence('file', [Field('header', 16)])
+        self.assertRaises(NoRepeatedEntriesError, self._generate, spec, '\x00\x07', 100)
+
+    def test_png(self):
+        specs_dir = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'specs')
+        spec = load_specs([os.path.join(specs_dir, 'png.xml')])[0]
+        sample = open(os.path.join(specs_dir, 'test', 'png', 'white.png'), 'rb').read()
+        data = self._generate(spec, sample, 4096)
+        self.assertTrue(3500 < len(data) < 4500)
+        value = instance.decode(spec, dt.Data(data))
+        self.assertTrue(len(value.chunks) > 100)
+        self.assertEqual(5, value.begin_chunk.header.width)
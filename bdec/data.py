@@ -145,12 +145,29 @@ class _OutOfDataError(Exception):
 _HEX_CHARACTERS = ['a', 'b', 'c', 'd', 'e', 'f', 'A', 'B', 'C', 'D', 'E', 'F', '0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
 
 class _ByteBuffer(object):
+    # Whether data in the buffer can be pending (see StreamBuffer).
+    is_stream = False
+
     def read_byte(self, offset):
         raise NotImplementedError()
 
     def __len__(self):
         raise NotImplementedError()
 
+    def release(self, offset):
+        """Allow the buffer to discard any data before the given byte offset.
+
+        Only buffers that keep the data read in memory need to implement this.
+        """
+        pass
+
+    def is_pending(self, end):
+        """Is data before the given bit offset yet to arrive?
+
+        end -- The bit offset. If None, checks the end of the data.
+        """
+        return False
+
     def _byte_iter(self):
         for i in range(len(self)):
             yield self.read_byte(i)
@@ -208,12 +225,18 @@ class _FileBuffer(_ByteBuffer):
 class _NonSeekingFileBuffer(_ByteBuffer):
     """Byte buffer that reads from a non-seekable file.
 
-    NOTE: Will keep the file in memory as it is read in to support streaming."""
+    NOTE: Will keep the file in memory as it is read in to support streaming,
+    until it is released."""
     def __init__(self, file):
         self._file = file
         self._buffer = ''
+        # The offset in the file of the first byte in self._buffer.
+        self._released = 0
 
     def read_byte(self, offset):
+        assert offset >= self._released, \
+                'Byte %i has already been released!' % offset
+        offset -= self._released
         extra_bytes_needed = offset + 1 - len(self._buffer)
         if extra_bytes_needed > 0:
             self._buffer += self._file.read(extra_bytes_needed)
@@ -221,14 +244,69 @@ class _NonSeekingFileBuffer(_ByteBuffer):
                 raise _OutOfDataError()
         return ord(self._buffer[offset])
 
+    def release(self, offset):
+        if offset <= self._released:
+            return
+        unread = offset - self._released - len(self._buffer)
+        if unread > 0:
+            # Some of the released data was never read; skip past it.
+            self._file.read(unread)
+        self._buffer = self._buffer[offset - self._released:]
+        self._released = offset
+
     def __len__(self):
         try:
-            for offset in itertools.count():
+            for offset in itertools.count(self._released):
                 self.read_byte(offset)
         except _OutOfDataError:
             return offset
 
 
+class StreamBuffer(_ByteBuffer):
+    """Byte buffer for data that arrives incrementally (eg: from a socket).
+
+    Data is added using append as it arrives, and close is called when no
+    more data will arrive. Until the stream is closed, data past the end of
+    the available data is 'pending' (see Data.is_pending)."""
+    is_stream = True
+
+    def __init__(self):
+        self._buffer = ''
+        # The offset in the stream of the first byte in self._buffer.
+        self._released = 0
+        self.is_closed = False
+
+    def append(self, bytes):
+        assert not self.is_closed, 'Cannot append to a closed stream!'
+        self._buffer += bytes
+
+    def close(self):
+        self.is_closed = True
+
+    def is_pending(self, end):
+        if self.is_closed:
+            return False
+        return end is None or (end + 7) / 8 > self._released + len(self._buffer)
+
+    def read_byte(self, offset):
+        assert offset >= self._released, \
+                'Byte %i has already been released!' % offset
+        offset -= self._released
+        if offset >= len(self._buffer):
+            raise _OutOfDataError()
+        return ord(self._buffer[offset])
+
+    def release(self, offset):
+        assert offset <= self._released + len(self._buffer), \
+                "Cannot release data that hasn't arrived!"
+        if offset > self._released:
+            self._buffer = self._buffer[offset - self._released:]
+            self._released = offset
+
+    def __len__(self):
+        return self._released + len(self._buffer)
+
+
 class _MemoryBuffer(_ByteBuffer):
     """Byte buffer that reads directly from in memory data."""
     def __init__(self, buffer):
@@ -248,6 +326,12 @@ class _MemoryBuffer(_ByteBuffer):
         return self._buffer
 
 
+def _int_to_bytes(value, num_bytes):
+    """Convert an integer to a big endian string of num_bytes bytes."""
+    if not num_bytes:
+        return ''
+    return ('%0*x' % (num_bytes * 2, value)).decode('hex')
+
 class Data(object):
     """
     A class to hold information about data to be decoded.
@@ -321,11 +405,50 @@ class Data(object):
             klass = Data
         return klass(self._buffer, self._start, self._end)
 
+    def release(self):
+        """Allow the underlying buffer to discard data before this instance.
+
+        Used when decoding streams, where the data that has already been
+        decoded doesn't need to be kept in memory. Any data instances that
+        refer to the released data can no longer be used.
+        """
+        self._buffer.release(self._start / 8)
+
+    def is_stream(self):
+        """Check whether the data comes from a bdec.data.StreamBuffer.
+
+        Only stream data can be pending, so decoders can skip checking
+        is_pending for other data.
+        """
+        return self._buffer.is_stream
+
+    def is_pending(self, length=None):
+        """Check whether some of the data is yet to arrive.
+
+        Only data from a bdec.data.StreamBuffer can be pending; data that is
+        missing from other sources will never arrive.
+
+        length -- The number of bits from the start of the data to check. If
+            None, all of the data is checked.
+        """
+        end = self._end
+        if length is not None:
+            if end is None:
+                end = self._start + length
+            else:
+                end = min(end, self._start + length)
+        return self._buffer.is_pending(end)
+
     def bytes(self):
         """Return a str instance representing the bytes held by this data.
 
         If the data length isn't a multiple of 8 bits, a DataError will be
         raised."""
+        if isinstance(self._buffer, _MemoryBuffer) and self._start % 8 == 0 \
+                and self._end is not None and self._end % 8 == 0 \
+                and self._end <= len(self._buffer) * 8:
+            # Optimise for in memory, byte aligned data.
+            return self._buffer._bytes()[self._start / 8:self._end / 8]
         return "".join(chr(byte) for byte in self._get_bytes())
 
     def text(self, encoding):
@@ -479,6 +602,15 @@ class Data(object):
         if not len(self):
             return 0
 
+        if isinstance(self._buffer, _MemoryBuffer) and \
+                self._end <= len(self._buffer) * 8:
+            # Optimise for in memory data; convert the bytes holding the data
+            # in one go, then drop the bits either side.
+            first = self._start / 8
+            last = (self._end + 7) / 8
+            result = int(self._buffer._bytes()[first:last].encode('hex'), 16)
+            return (result >> (last * 8 - self._end)) & ((1 << len(self)) - 1)
+
         data = self.copy()
         result = 0
         for bit in data.pop(len(data) % 8)._get_bits():
@@ -543,6 +675,38 @@ class Data(object):
 
         return Data(left + right, left_start, left_start + len(self) + len(other))
 
+    @staticmethod
+    def join(items):
+        """Concatenate an iterable of data instances.
+
+        Adding data instances copies the data on every addition; joining them
+        builds the result in a single buffer.
+        """
+        chunks = []
+        # Bits that don't yet make up a whole byte are held in an integer.
+        value = 0
+        num_bits = 0
+        total = 0
+        for data in items:
+            length = len(data)
+            total += length
+            if not num_bits and length % 8 == 0:
+                chunks.append(data.bytes())
+                continue
+
+            value = (value << length) | int(data)
+            num_bits += length
+
+            if num_bits >= 64:
+                extra = num_bits % 8
+                chunks.append(_int_to_bytes(value >> extra, num_bits / 8))
+                value &= (1 << extra) - 1
+                num_bits = extra
+        if num_bits:
+            padding = (8 - num_bits % 8) % 8
+            chunks.append(_int_to_bytes(value << padding, (num_bits + padding) / 8))
+        return Data(''.join(chunks), 0, total)
+
     def _get_bytes(self):
         """
         Return an iterator to a series of byte values in the data.
@@ -16,12 +16,18 @@
 #   License along with this library; if not, see
 #   <http://www.gnu.org/licenses/>.
 
+from bdec import DecodeError
 from bdec.choice import Choice
+import bdec.data as dt
 from bdec.decode.choice import ChoiceDecoder
-from bdec.decode.entry import Child
+from bdec.decode.entry import Child, EmptyRecordError, is_empty_record
 from bdec.decode.field import FieldDecoder
+from bdec.decode.index import StaleIndexError, spec_hash
+from bdec.decode.select import QuietDecoder, split_path, UnknownPathError
 from bdec.decode.sequence import SequenceDecoder
 from bdec.decode.sequenceof import SequenceOfDecoder
+from bdec.decode.skim import is_skippable, SkipDecoder
+from bdec.entry import DecodeLengthError, EntryDataError
 from bdec.field import Field
 from bdec.sequence import Sequence
 from bdec.sequenceof import SequenceOf
@@ -33,12 +39,27 @@ _decoders = {
         Choice : ChoiceDecoder,
         }
 
+# How Decoder.decode_many handles messages that fail to decode.
+RAISE = 'raise'
+SKIP = 'skip'
+COLLECT = 'collect'
+
+def _skip(decoder):
+    if is_skippable(decoder):
+        return SkipDecoder(decoder)
+    return decoder
+
 class Decoder:
     """ Decode instance data based on a specification. """
-    def __init__(self, entry):
+    def __init__(self, entry, profiler=None, select=None):
         """Construct a decoder instance.
 
         entry -- The entry that will be used for the decoding.
+        profiler -- A bdec.decode.profile.Profiler instance to record the
+            cost of decoding each entry. If None, the decode isn't profiled.
+        select -- A list of paths to the entries that should be decoded (see
+            bdec.decode.select). Entries that aren't selected are output as
+            a single hidden entry. If None, all entries are decoded.
         """
 
         # Inspect the parameters for the entries to decode.
@@ -47,29 +68,218 @@ class Decoder:
         expression_params = bdec.inspect.param.ExpressionParameters([entry])
         params = bdec.inspect.param.CompoundParameters([end_entry_params, expression_params])
 
+        wrap = None
+        if profiler is not None:
+            wrap = profiler.wrap
         self._entries = {}
-        self._decoder = self._get_decoder(entry, params)
+        if select is None:
+            self._decoder = self._get_decoder(entry, params, self._entries, wrap)
+        else:
+            paths = []
+            for path in select:
+                names = split_path(path)
+                if names[0] != entry.name:
+                    raise UnknownPathError(entry, path)
+                paths.append((path, names[1:]))
+            matched = set()
+            self._decoder = self._get_selected_decoder(entry, params,
+                    self._entries, wrap, paths, matched, set())
+            for path, names in paths:
+                if path not in matched:
+                    raise UnknownPathError(entry, path)
+        if profiler is not None:
+            self._decoder = profiler.wrap(self._decoder)
+        self._params = params
+        self._skimmer = None
+        self._spec_hash = None
+
+    def spec_hash(self):
+        """Return a hash identifying the structure of the decoded entry."""
+        if self._spec_hash is None:
+            self._spec_hash = spec_hash(self._decoder.entry)
+        return self._spec_hash
 
     def decode(self, data, context, name):
         return self._decoder.decode(data, context, name)
 
-    def _get_decoder(self, entry, lookup):
+    def iter_records(self, data, context={}, name=None):
+        """Repeatedly decode the entry until all of the data is consumed.
+
+        Yields a list of (is_starting, name, entry, data, value) tuples for
+        each record as soon as it has been decoded. Data that has been
+        decoded is released from the underlying buffer when the next record
+        is requested, so the items of a record should be used (or copied)
+        before moving on to the next record. Raises EmptyRecordError if a
+        record doesn't decode any data.
+
+        data -- An instance of bdec.data.Data to decode.
+        context -- The context to decode each record in.
+        name -- The name to use for the records. If None, uses the entry's
+            name.
+        """
+        while not data.empty():
+            items = list(self._decoder.decode(data, dict(context), name))
+            if is_empty_record(items):
+                raise EmptyRecordError(self._decoder.entry)
+            yield items
+            data.release()
+
+    def decode_many(self, messages, errors=RAISE, context={}, name=None):
+        """Decode many independent messages.
+
+        This is a convenience for decoding each message in turn, and checking
+        that all of its data was decoded; it isn't any faster than calling
+        decode for each message, as the cost is in decoding the entries.
+
+        Returns an iterator to a list of (is_starting, name, entry, data,
+        value) tuples for each message. A message that doesn't decode all of
+        its data fails with a DecodeLengthError.
+
+        messages -- An iterable of str instances, each holding a message.
+        errors -- How to handle messages that fail to decode. RAISE re-raises
+            the DecodeError, SKIP ignores the message, and COLLECT returns
+            the DecodeError in place of the message's items.
+        context -- The context to decode each message in.
+        name -- The name to use for the messages. If None, uses the entry's
+            name.
+        """
+        assert errors in (RAISE, SKIP, COLLECT), "Unknown error handling '%s'!" % errors
+        decoder = self._decoder
+        for message in messages:
+            data = dt.Data(message)
+            try:
+                items = list(decoder.decode(data, dict(context), name))
+                try:
+                    if len(data):
+                        raise DecodeLengthError(decoder.entry, data)
+                except dt.NotEnoughDataError, ex:
+                    # Some entries (such as binary fields) are not read
+                    # when decoded, and extend past the end of the message.
+                    raise EntryDataError(decoder.entry, ex)
+            except DecodeError, ex:
+                if errors == RAISE:
+                    raise
+                elif errors == SKIP:
+                    continue
+                items = ex
+            yield items
+
+    def skim_records(self, data, context={}, name=None):
+        """Find the offsets of consecutive records in the data.
+
+        Only the entries needed to determine the length of each record are
+        decoded; other entries are skipped over.
+
+        Returns an iterator to the offset in bits of each record from the
+        start of the data. Raises EmptyRecordError if a record doesn't decode
+        any data.
+        """
+        if self._skimmer is None:
+            self._skimmer = self._get_decoder(self._decoder.entry,
+                    self._params, {}, _skip)
+
+        offset = 0
+        while not data.empty():
+            yield offset
+            start = offset
+            items = self._skimmer.decode(data, dict(context), name)
+            for is_starting, item_name, entry, entry_data, value in items:
+                if not is_starting:
+                    offset += len(entry_data)
+            if offset == start:
+                raise EmptyRecordError(self._decoder.entry)
+
+    def decode_at(self, index, n, data, context={}, name=None):
+        """Decode the n'th record in the data.
+
+        index -- A bdec.decode.index.RecordIndex instance created for the
+            data.
+        n -- The record to decode.
+        data -- The bdec.data.Data instance the index was created from.
+        """
+        if index.spec_hash != self.spec_hash():
+            raise StaleIndexError(self._decoder.entry)
+        data = data.copy()
+        data.pop(index.offsets[n])
+        return self._decoder.decode(data, dict(context), name)
+
+    def _create_decoder(self, entry, lookup):
+        return _decoders[type(entry)](entry, lookup.get_params(entry),
+                lookup.is_end_sequenceof(entry),
+                lookup.is_value_referenced(entry),
+                lookup.is_length_referenced(entry))
+
+    def _get_selected_decoder(self, entry, lookup, entries, wrap, paths,
+            matched, visited):
+        """Create a decoder that only outputs the selected entries.
+
+        Returns None if none of the paths match an entry below this entry.
+
+        paths -- A list of (path, names) tuples, where names are the names
+            of the selected entry below this entry.
+        matched -- The set of paths that have been found.
+        visited -- The entries (and paths) currently being created, used to
+            detect recursive entries.
+        """
+        for path, names in paths:
+            if not names:
+                # This entry has been selected, so all of its children are
+                # output.
+                matched.add(path)
+                return self._get_decoder(entry, lookup, entries, wrap)
+        key = (entry, tuple(names for path, names in paths))
+        if key in visited:
+            # A recursive entry (through choices); we won't match anything
+            # that wasn't matched by the outer entry.
+            return None
+        visited.add(key)
+
+        # The decoder for this entry depends on the selected paths, so we
+        # don't cache it.
+        decoder = self._create_decoder(entry, lookup)
+        is_matched = False
+        for child in entry.children:
+            child_paths = [(path, names[1:]) for path, names in paths
+                    if names[0] == child.name]
+            if isinstance(entry, Choice):
+                # The children of options can be selected without naming
+                # the option.
+                child_paths += paths
+            child_decoder = None
+            if child_paths:
+                child_decoder = self._get_selected_decoder(child.entry, lookup,
+                        entries, wrap, child_paths, matched, visited)
+            if child_decoder is not None:
+                is_matched = True
+            else:
+                child_decoder = QuietDecoder(self._get_decoder(child.entry,
+                    lookup, entries, wrap))
+            if wrap is not None:
+                child_decoder = wrap(child_decoder)
+            passed_params = zip(lookup.get_passed_variables(entry, child),
+                    lookup.get_params(child.entry))
+            decoder.children.append(Child(child.name, child_decoder, passed_params))
+        visited.remove(key)
+        if not is_matched:
+            return None
+        return decoder
+
+    def _get_decoder(self, entry, lookup, entries, wrap):
         try:
-            return self._entries[entry]
+            return entries[entry]
         except KeyError:
             # This entry hasn't been referenced yet; create a decoder for it.
-            decoder = _decoders[type(entry)](entry, lookup.get_params(entry),
-                    lookup.is_end_sequenceof(entry),
-                    lookup.is_value_referenced(entry),
-                    lookup.is_length_referenced(entry))
+            decoder = self._create_decoder(entry, lookup)
 
-            self._entries[entry] = decoder
+            entries[entry] = decoder
 
             # Construct the children decoders
             for child in entry.children:
                 passed_params = zip(lookup.get_passed_variables(entry, child),
                         lookup.get_params(child.entry))
-                decoder.children.append(Child(child.name,
-                    self._get_decoder(child.entry, lookup), passed_params))
+                child_decoder = self._get_decoder(child.entry, lookup, entries, wrap)
+                if wrap is not None:
+                    child_decoder = wrap(child_decoder)
+                decoder.children.append(Child(child.name, child_decoder, passed_params))
 
             return decoder
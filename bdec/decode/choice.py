@@ -18,20 +18,48 @@
 
 import bdec
 import bdec.data as dt
-from bdec.decode.entry import EntryDecoder
+from bdec.decode.entry import EntryDecoder, NEED_DATA
 import bdec.inspect.chooser as chsr
 
+class ChoiceStats:
+    """Statistics on how well the options of a choice are chosen."""
+    def __init__(self, entry, location):
+        self.entry = entry
+        self.location = location
+        # The number of times the chooser found no options, a single option,
+        # and multiple options.
+        self.none = 0
+        self.single = 0
+        self.multiple = 0
+        # The number of trial decodes, and the bits decoded by them (which
+        # are discarded, even if the trial succeeds).
+        self.trials = 0
+        self.discarded_bits = 0
+
+    def __str__(self):
+        filename, line_number, column_number = self.location
+        return "%s (%s[%i])" % (self.entry, filename, line_number)
+
+
 class ChoiceDecoder(EntryDecoder):
     def __init__(self, *args, **kwargs):
         EntryDecoder.__init__(self, *args, **kwargs)
         self._chooser = None
+        # A ChoiceStats instance to update when decoding; if None, no
+        # statistics are collected.
+        self.stats = None
 
     def _decode(self, data, context, name):
         if self._chooser is None:
             self._chooser = chsr.Chooser([child.decoder.entry for child in self.children])
+        entries = self._chooser.choose(data)
+        while entries is None:
+            yield NEED_DATA
+            entries = self._chooser.choose(data)
+
         # Convert the list of entries to a list of children.
         possibles = []
-        for entry in self._chooser.choose(data):
+        for entry in entries:
             for child in self.children:
                 if child.decoder.entry is entry:
                     possibles.append(child)
@@ -41,6 +69,15 @@ class ChoiceDecoder(EntryDecoder):
 
         yield (True, name, self.entry, data, None)
 
+        stats = self.stats
+        if stats is not None:
+            if len(possibles) == 0:
+                stats.none += 1
+            elif len(possibles) == 1:
+                stats.single += 1
+            else:
+                stats.multiple += 1
+
         failure_expected = False
         if len(possibles) == 0:
             # None of the items match. In this case we want to choose
@@ -71,14 +108,23 @@ class ChoiceDecoder(EntryDecoder):
                     bits_decoded = 0
                     entries_decoded = 0
                     for is_starting, child_name, entry, entry_data, value in self._decode_child(child, data.copy(), context.copy()):
-                        if not is_starting:
+                        if entry is None:
+                            # The trial decode is waiting for more data.
+                            yield NEED_DATA
+                        elif not is_starting:
                             bits_decoded += len(entry_data)
                             entries_decoded += 1
 
                     # We successfully decoded the entry!
                     best_guess = child
+                    if stats is not None:
+                        stats.trials += 1
+                        stats.discarded_bits += bits_decoded
                     break
                 except bdec.DecodeError:
+                    if stats is not None:
+                        stats.trials += 1
+                        stats.discarded_bits += bits_decoded
                     if best_guess is None or \
                         bits_decoded > best_guess_bits or \
                         (bits_decoded == best_guess_bits and entries_decoded > best_guess_entries):
@@ -46,6 +46,12 @@ from bdec import DecodeError
 import bdec.data as dt
 from bdec.entry import DecodeLengthError, EntryDataError
 
+# Event yielded by the decoders when decoding data from a stream, where the
+# data needed to continue the decode has yet to arrive. The decode continues
+# from the same point when the iterator is next resumed. Note that the entry of
+# this event is None; all other events have an entry.
+NEED_DATA = (True, None, None, None, None)
+
 class Param:
     def __init__(self, parent_name, child_name):
         self.parent_name = parent_name
@@ -84,6 +90,18 @@ class MissingContextError(DecodeError):
         return "%s unable to find '%s' from context for child %s!" % \
                 (self.entry, self.name, self.child)
 
+class EmptyRecordError(DecodeError):
+    """A record didn't decode any data, so the records would never end."""
+    def __str__(self):
+        return "%s decoded an empty record!" % self.entry
+
+def is_empty_record(items):
+    """Check whether a record's decode items didn't decode any data."""
+    for is_starting, name, entry, data, value in items:
+        if not is_starting and len(data):
+            return False
+    return True
+
 
 class EntryDecoder:
     def __init__(self, entry, params, is_end_sequenceof, is_value_referenced, is_length_referenced):
@@ -18,7 +18,7 @@
 
 import bdec.data as dt
 from bdec.field import FieldDataError
-from bdec.decode.entry import EntryDecoder
+from bdec.decode.entry import EntryDecoder, NEED_DATA
 
 class FieldDecoder(EntryDecoder):
     """ An instance to decode field entries to python objects. """
@@ -28,6 +28,9 @@ class FieldDecoder(EntryDecoder):
         yield (True, name, self.entry, data, None)
 
         field_data = data.pop(self.entry.length.evaluate(context))
+        if field_data.is_stream():
+            while field_data.is_pending():
+                yield NEED_DATA
         # As this popped data is not guaranteed to be available, we have to
         # wrap all access to it in an exception handler.
         try:
@@ -0,0 +1,133 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Indexes of the record boundaries in data made up of consecutive records.
+
+An index allows a record to be decoded without decoding all of the records
+before it (see bdec.decode.Decoder.decode_at). Indexes can be saved to a
+'sidecar' file alongside the data, and include a hash of the specification
+so stale indexes can be detected.
+"""
+
+import array
+import hashlib
+import struct
+
+import bdec
+from bdec.field import Field
+from bdec.sequence import Sequence
+from bdec.sequenceof import SequenceOf
+
+_MAGIC = 'BDIX'
+_VERSION = 1
+_HEADER = struct.Struct('>4sH20sQ')
+# The number of offsets to write at a time.
+_CHUNK_SIZE = 4096
+
+# The offsets are in bits, so we want 64 bit integers if they are available.
+# Doubles can exactly store integers up to 2^53.
+_OFFSET_TYPE = 'L' if array.array('L').itemsize >= 8 else 'd'
+
+class StaleIndexError(bdec.DecodeError):
+    """The index wasn't created for this specification."""
+    def __str__(self):
+        return "Index wasn't created for the specification of %s" % self.entry
+
+class InvalidIndexError(Exception):
+    """The index file is corrupt."""
+    def __init__(self, reason):
+        self.reason = reason
+
+    def __str__(self):
+        return 'Invalid index file; %s' % self.reason
+
+
+def _describe(entry):
+    """Return a description of an entry's attributes (excluding children)."""
+    result = [entry.__class__.__name__, entry.name, repr(entry.length),
+            repr(entry.constraints)]
+    if isinstance(entry, Field):
+        result += [entry.format, entry.encoding]
+    elif isinstance(entry, Sequence):
+        result.append(repr(entry.value))
+    elif isinstance(entry, SequenceOf):
+        result.append(repr(entry.count))
+        result.append(repr([e.name for e in entry.end_entries]))
+    return '|'.join(str(r) for r in result)
+
+def spec_hash(entry):
+    """Return a hash of the structure of an entry and all of its children."""
+    digest = hashlib.sha1()
+    ids = {}
+    stack = [entry]
+    while stack:
+        entry = stack.pop()
+        if entry in ids:
+            continue
+        ids[entry] = len(ids)
+        digest.update(_describe(entry))
+        for child in entry.children:
+            # Include the child's position in the walk so that recursive
+            # and common entries are distinguished.
+            digest.update('|%s|%s' % (child.name, ids.get(child.entry, -1)))
+            stack.append(child.entry)
+        digest.update('\n')
+    return digest.digest()
+
+
+class RecordIndex:
+    """The offsets (in bits) of each record in a data source."""
+    def __init__(self, offsets, spec_hash):
+        self.offsets = array.array(_OFFSET_TYPE, offsets)
+        self.spec_hash = spec_hash
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def save(self, output):
+        """Write the index to a file object opened in binary mode."""
+        output.write(_HEADER.pack(_MAGIC, _VERSION, self.spec_hash, len(self.offsets)))
+        for i in xrange(0, len(self.offsets), _CHUNK_SIZE):
+            chunk = self.offsets[i:i + _CHUNK_SIZE]
+            output.write(struct.pack('>%iQ' % len(chunk), *map(int, chunk)))
+
+    @staticmethod
+    def load(input):
+        """Read an index from a file object opened in binary mode."""
+        header = input.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise InvalidIndexError('missing header')
+        magic, version, spec_hash, count = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise InvalidIndexError('not an index file')
+        if version != _VERSION:
+            raise InvalidIndexError('unknown version %i' % version)
+        offsets = input.read(count * 8)
+        if len(offsets) != count * 8:
+            raise InvalidIndexError('expected %i offsets' % count)
+        return RecordIndex(struct.unpack('>%iQ' % count, offsets), spec_hash)
+
+
+def create_index(decoder, data):
+    """Create an index of the records in the data.
+
+    decoder -- A bdec.decode.Decoder instance for the records.
+    data -- A bdec.data.Data instance containing consecutive records.
+    """
+    return RecordIndex(decoder.skim_records(data), decoder.spec_hash())
@@ -0,0 +1,195 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""Decode independent records in parallel using multiple processes.
+
+Once the boundaries of the records in a file are known (either from a
+bdec.decode.index.RecordIndex, or because the records have a fixed size), the
+records can be decoded independently of each other. Each worker process loads
+the specification once, maps the input file into memory, and decodes ranges of
+records; the decoded records are returned to the caller in order.
+"""
+
+import mmap
+import multiprocessing
+import os
+
+import bdec
+import bdec.data as dt
+from bdec.decode.index import RecordIndex, spec_hash, StaleIndexError
+from bdec.entry import DecodeLengthError
+import bdec.output.instance as instance
+import bdec.output.jsonout as jsonout
+import bdec.output.xmlout as xmlout
+import bdec.spec
+
+XML = 'xml'
+JSON = 'json'
+INSTANCE = 'instance'
+
+class RecordDecodeError(Exception):
+    """Raised when a record fails to decode in a worker process.
+
+    The original DecodeError references entries in the worker process, so
+    only the record number and a description of the error is available.
+    """
+    def __init__(self, record, message):
+        Exception.__init__(self)
+        self.record = record
+        self.message = message
+
+    def __str__(self):
+        return 'Record %i: %s' % (self.record, self.message)
+
+# Specifications loaded in this process, keyed by the arguments to
+# load_specs. When the worker processes are forked they inherit the loaded
+# specifications, and so don't need to load them again.
+_specs = {}
+
+def load_specs(specs, main_name=None, should_remove_unused=False):
+    """Load (and cache) a specification.
+
+    See bdec.spec.load_specs for a description of the arguments.
+    """
+    key = (tuple(specs), main_name, should_remove_unused)
+    try:
+        return _specs[key]
+    except KeyError:
+        result = bdec.spec.load_specs(specs, main_name, should_remove_unused)
+        _specs[key] = result
+        return result
+
+
+class _Worker:
+    """Decodes records from a memory mapped file."""
+    def __init__(self, specs, main_name, should_remove_unused, filename,
+            format, verbose):
+        self.entry, common, self.lookup = load_specs(specs, main_name,
+                should_remove_unused)
+        self.format = format
+        self.verbose = verbose
+        self._file = open(filename, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def decode(self, start, end):
+        """Decode the record between the start and end bit offsets."""
+        offset = start % 8
+        data = dt.Data(self._buffer[start / 8:(end + 7) / 8], offset,
+                offset + end - start)
+        if self.format == XML:
+            result = xmlout.to_string(self.entry.decode(data), self.verbose)
+        elif self.format == JSON:
+            result = jsonout.to_string(self.entry.decode(data), self.verbose)
+        else:
+            result = instance.get_instance(self.entry.decode(data))
+        if not data.empty():
+            raise DecodeLengthError(self.entry, data)
+        return result
+
+    def describe(self, ex):
+        try:
+            filename, line_number, column_number = self.lookup[ex.entry]
+        except KeyError:
+            filename, line_number, column_number = ('unknown', 0, 0)
+        return "%s[%i]: %s" % (filename, line_number, str(ex))
+
+_worker = None
+
+def _init_worker(*args):
+    global _worker
+    _worker = _Worker(*args)
+
+def _decode_chunk(chunk):
+    """Decode a range of records.
+
+    Returns a tuple containing the decoded records, and if a record failed to
+    decode, a tuple of (record number, error description).
+    """
+    first, offsets = chunk
+    results = []
+    for i in range(len(offsets) - 1):
+        try:
+            results.append(_worker.decode(offsets[i], offsets[i + 1]))
+        except bdec.DecodeError, ex:
+            return results, (first + i, _worker.describe(ex))
+    return results, None
+
+def _chunks(offsets, end, size):
+    """Split the record offsets into chunks of 'size' records.
+
+    Each chunk includes the offset of the record following it (or the end of
+    the data), so the workers know where each record stops.
+    """
+    chunk = []
+    first = 0
+    for offset in offsets:
+        chunk.append(int(offset))
+        if len(chunk) == size + 1:
+            yield first, chunk
+            first += size
+            chunk = chunk[-1:]
+    if chunk:
+        chunk.append(end)
+        yield first, chunk
+
+def decode(specs, filename, offsets, jobs=None, format=XML, main_name=None,
+        should_remove_unused=False, verbose=False, chunk_size=64):
+    """Decode the records in a file using multiple processes.
+
+    Returns an iterator to the decoded records, in the order they appear in
+    the file. Raises RecordDecodeError if a record fails to decode, and
+    StaleIndexError if the RecordIndex wasn't created for the specification.
+
+    specs -- The specifications to load (see bdec.spec.load_specs).
+    filename -- The file containing the records.
+    offsets -- The record boundaries; either a RecordIndex, an iterable of
+      bit offsets, or an integer specifying the size in bits of each record.
+    jobs -- The number of worker processes. If None, uses the number of cpus.
+    format -- Either XML or JSON (each record is returned as a string), or
+      INSTANCE (each record is returned as a python instance).
+    chunk_size -- The number of records sent to a worker at a time.
+    """
+    assert format in (XML, JSON, INSTANCE)
+
+    # Load the specification before creating the pool, so forked workers
+    # don't have to load it again.
+    entry = load_specs(specs, main_name, should_remove_unused)[0]
+
+    end = os.path.getsize(filename) * 8
+    if isinstance(offsets, RecordIndex):
+        if offsets.spec_hash != spec_hash(entry):
+            raise StaleIndexError(entry)
+        offsets = offsets.offsets
+    elif isinstance(offsets, (int, long)):
+        offsets = xrange(0, end, offsets)
+    if end == 0:
+        return
+
+    pool = multiprocessing.Pool(jobs, _init_worker, (specs, main_name,
+        should_remove_unused, filename, format, verbose))
+    try:
+        for results, error in pool.imap(_decode_chunk,
+                _chunks(offsets, end, chunk_size)):
+            for result in results:
+                yield result
+            if error is not None:
+                raise RecordDecodeError(*error)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
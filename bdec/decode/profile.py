@@ -0,0 +1,135 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Support for profiling the decode of a specification.
+
+A Profiler records, for each entry, the number of times it was decoded, the
+time spent decoding it (both including and excluding the time spent decoding
+its children), and the number of bits it decoded. For choices it also records
+how often the options had to be trial decoded (see
+bdec.decode.choice.ChoiceStats). Profiling only affects decoders created with
+a profiler (see bdec.decode.Decoder).
+"""
+
+import time
+
+from bdec.decode.choice import ChoiceDecoder, ChoiceStats
+from bdec.decode.entry import EntryDecoder
+
+class EntryStats:
+    """The profiling results for an entry."""
+    def __init__(self, entry, location):
+        self.entry = entry
+        self.location = location
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.bits = 0
+
+    def __str__(self):
+        filename, line_number, column_number = self.location
+        return "%s (%s[%i])" % (self.entry, filename, line_number)
+
+
+class ProfileDecoder(EntryDecoder):
+    """A decoder that records the cost of decoding an entry."""
+    def __init__(self, decoder, stats, stack):
+        EntryDecoder.__init__(self, decoder.entry, decoder._inputs,
+                False, False, False)
+        self._decoder = decoder
+        self._stats = stats
+        # The time spent in child entries for each profiled decoder that is
+        # currently running.
+        self._stack = stack
+
+    def decode(self, data, context, name=None):
+        stats = self._stats
+        stack = self._stack
+        stats.calls += 1
+        items = self._decoder.decode(data, context, name)
+        while 1:
+            stack.append(0.0)
+            start = time.time()
+            try:
+                item = items.next()
+            finally:
+                elapsed = time.time() - start
+                stats.inclusive += elapsed
+                stats.exclusive += elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+            if not item[0]:
+                stats.bits += len(item[3])
+            yield item
+
+
+class Profiler:
+    """Collects the profiling results for the entries of a decoder."""
+    def __init__(self, lookup={}):
+        """Construct a profiler.
+
+        lookup -- A dictionary of entries to (filename, line, column) tuples,
+            as returned by bdec.spec.load_specs.
+        """
+        self.stats = {}
+        self.choices = {}
+        self._lookup = lookup
+        self._stack = []
+
+    def wrap(self, decoder):
+        """Return a decoder that profiles the given decoder."""
+        entry = decoder.entry
+        location = self._lookup.get(entry, ('unknown', 0, 0))
+        try:
+            stats = self.stats[entry]
+        except KeyError:
+            stats = self.stats[entry] = EntryStats(entry, location)
+        if isinstance(decoder, ChoiceDecoder) and decoder.stats is None:
+            decoder.stats = self.choices[entry] = ChoiceStats(entry, location)
+        return ProfileDecoder(decoder, stats, self._stack)
+
+    def report(self, output, count=20):
+        """Write the entries that took the most time to decode.
+
+        Entries are ordered by the time spent decoding them, excluding the
+        time spent in their children.
+        """
+        stats = sorted(self.stats.values(), key=lambda s: s.exclusive,
+                reverse=True)
+        output.write('%8s %10s %10s %12s  %s\n' % ('calls', 'incl (s)',
+            'excl (s)', 'bits', 'entry'))
+        for entry_stats in stats[:count]:
+            output.write('%8i %10.4f %10.4f %12i  %s\n' % (entry_stats.calls,
+                entry_stats.inclusive, entry_stats.exclusive,
+                entry_stats.bits, entry_stats))
+
+    def report_choices(self, output, count=20):
+        """Write the choices that had to trial decode their options.
+
+        Choices are ordered by the number of bits decoded then discarded by
+        the trial decodes.
+        """
+        choices = sorted((c for c in self.choices.values() if c.trials),
+                key=lambda c: c.discarded_bits, reverse=True)
+        output.write('%8s %8s %8s %8s %12s  %s\n' % ('none', 'single',
+            'multiple', 'trials', 'discarded', 'choice'))
+        for stats in choices[:count]:
+            output.write('%8i %8i %8i %8i %12i  %s\n' % (stats.none,
+                stats.single, stats.multiple, stats.trials,
+                stats.discarded_bits, stats))
@@ -0,0 +1,84 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Support for decoding only selected entries.
+
+When only some entries of a specification are needed, the entries that
+aren't selected don't need to be output. They can be skipped if their
+length is known (see bdec.decode.skim), otherwise they are decoded without
+outputting their children (as their values may be needed to decode the
+rest of the data).
+
+Entries are selected with a path of names separated by '.', starting from
+the name of the decoded entry (eg: 'png.chunks.chunk.type'). As in the xml
+output, choices are transparent; the children of a choice's options can be
+selected without naming the option.
+"""
+
+from bdec import DecodeError
+import bdec.entry as ent
+from bdec.decode.entry import EntryDecoder, NEED_DATA
+from bdec.decode.skim import is_skippable, SkipDecoder
+
+class UnknownPathError(DecodeError):
+    """Raised when a selected path doesn't match any entry."""
+    def __init__(self, entry, path):
+        DecodeError.__init__(self, entry)
+        self.path = path
+
+    def __str__(self):
+        return "%s has no entry matching '%s'!" % (self.entry, self.path)
+
+def split_path(path):
+    return tuple(path.split('.'))
+
+def _hidden_name(name):
+    if ent.is_hidden(name):
+        return name
+    return name + ':'
+
+class QuietDecoder(EntryDecoder):
+    """A decoder for an entry that hasn't been selected.
+
+    The entry is output as a single hidden entry, with the data of all of
+    its children.
+    """
+    def __init__(self, decoder):
+        EntryDecoder.__init__(self, decoder.entry,
+                decoder._inputs + decoder._outputs, False, False, False)
+        if is_skippable(decoder):
+            self._decoder = SkipDecoder(decoder)
+        else:
+            self._decoder = decoder
+
+    def decode(self, data, context, name=None):
+        if name is None:
+            name = self.entry.name
+
+        start = data.copy()
+        length = 0
+        for is_starting, child_name, entry, entry_data, value in self._decoder.decode(data, context, name):
+            if entry is None:
+                yield NEED_DATA
+            elif not is_starting:
+                length += len(entry_data)
+        decoded = start.pop(length)
+        name = _hidden_name(name)
+        yield (True, name, self.entry, decoded, None)
+        yield (False, name, self.entry, decoded, None)
@@ -17,7 +17,7 @@
 #   <http://www.gnu.org/licenses/>.
 
 import bdec.data as dt
-from bdec.decode.entry import EntryDecoder
+from bdec.decode.entry import EntryDecoder, NEED_DATA
 from bdec.sequenceof import SequenceEndedEarlyError, NegativeSequenceofLoop, \
         SequenceofStoppedBeforeEndEntry
 
@@ -38,12 +38,22 @@ class SequenceOfDecoder(EntryDecoder):
             while not context['should end']:
                 yield None
         else:
-            while data:
+            # Only stream data can be pending, so check it once up front.
+            is_stream = data.is_stream()
+            while 1:
+                # Wait until we know whether there is more data.
+                while is_stream and data.is_pending(1):
+                    yield NEED_DATA
+                if not data:
+                    break
                 yield None
 
     def _decode(self, data, context, name):
         yield (True, name, self.entry, data, None)
         for i in self._loop(context, data):
+            if i is NEED_DATA:
+                yield NEED_DATA
+                continue
             if self.entry.end_entries and context['should end']:
                 raise SequenceEndedEarlyError(self.entry)
             for item in self._decode_child(self.children[0], data, context):
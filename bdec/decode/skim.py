@@ -0,0 +1,90 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""
+Support for quickly skipping over entries whose values aren't needed.
+
+When looking for the boundaries of records, only the entries needed to
+calculate the record lengths have to be decoded; all other entries can be
+skipped if their length can be determined without decoding them.
+"""
+
+import bdec.data as dt
+from bdec.decode.entry import EntryDecoder
+from bdec.entry import EntryDataError
+
+def _has_constraints(entry, visited):
+    if entry in visited:
+        return False
+    visited.add(entry)
+    if entry.constraints:
+        return True
+    for child in entry.children:
+        if _has_constraints(child.entry, visited):
+            return True
+    return False
+
+def is_skippable(decoder):
+    """Can the entry decoded by decoder be skipped without decoding it.
+
+    An entry can be skipped if nothing else depends on its value, it cannot
+    fail to decode (ie: it has no constraints), and its length can be
+    determined without decoding it.
+    """
+    entry = decoder.entry
+    if decoder._outputs or decoder._is_value_referenced or \
+            decoder._is_length_referenced or decoder._is_end_sequenceof:
+        return False
+    if _has_constraints(entry, set()):
+        # Constraints are used to select options within choices, so we
+        # cannot skip entries that may fail to decode.
+        return False
+    if entry.length is not None:
+        return True
+    range = entry.range(set())
+    return range.min == range.max
+
+
+class SkipDecoder(EntryDecoder):
+    """A decoder that skips over the data of an entry.
+
+    The data of the skipped entry is returned in the 'end' item, with a
+    value of None.
+    """
+    def __init__(self, decoder):
+        EntryDecoder.__init__(self, decoder.entry, decoder._inputs,
+                False, False, False)
+        if self.entry.length is None:
+            self._length = self.entry.range(set()).min
+        else:
+            self._length = None
+
+    def decode(self, data, context, name=None):
+        if name is None:
+            name = self.entry.name
+
+        length = self._length
+        if length is None:
+            length = self.entry.length.evaluate(context)
+        try:
+            skipped = data.pop(length)
+            skipped.validate()
+        except dt.DataError, ex:
+            raise EntryDataError(self.entry, ex)
+        yield (True, name, self.entry, skipped, None)
+        yield (False, name, self.entry, skipped, None)
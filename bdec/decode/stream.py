@@ -0,0 +1,177 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""Decode records from data that arrives incrementally.
+
+Network protocols typically deliver data in fragments. The streams in this
+module are fed the fragments as they arrive; when the decode runs out of data
+it is suspended at the entry that needs it, and resumed when the next
+fragment is fed (instead of failing with a NotEnoughDataError). The data
+that has already been decoded isn't decoded again.
+
+RecordDispatcher uses a RecordStream to decode records from sockets using an
+asyncore event loop, allowing many connections to be decoded in a single
+thread.
+"""
+
+import asyncore
+
+import bdec.data as dt
+from bdec.decode.entry import EmptyRecordError
+
+class EventStream:
+    """Push style decoder for a stream of records."""
+    def __init__(self, decoder, context={}, name=None):
+        """Construct a stream.
+
+        decoder -- The bdec.decode.Decoder instance used to decode records.
+        context -- The context to decode each record in.
+        name -- The name to use for the records. If None, uses the entry's
+            name.
+        """
+        self._decoder = decoder
+        self._context = context
+        self._name = name
+        self._buffer = dt.StreamBuffer()
+        self._data = dt.Data(self._buffer)
+        # The data from the start of the record currently being decoded.
+        self._record = self._data.copy()
+        # The suspended decode of the current record.
+        self._items = None
+        # Whether the current record has decoded any data.
+        self._is_empty = True
+
+    def feed(self, bytes):
+        """Add data to the stream.
+
+        Returns a list of the (is_starting, name, entry, data, value) decode
+        events completed by the data. Events of the records completed before
+        this call are released, so should no longer be used.
+
+        If a DecodeError is raised the stream can no longer be used.
+        """
+        self._record.release()
+        self._buffer.append(bytes)
+        return self._decode()
+
+    def close(self):
+        """Indicate that no more data will arrive.
+
+        Returns a list of the remaining decode events. Raises a DecodeError if
+        the data doesn't end on a record boundary.
+        """
+        self._record.release()
+        self._buffer.close()
+        result = self._decode()
+        assert self._items is None
+        return result
+
+    def _decode(self):
+        result = []
+        while 1:
+            if self._items is None:
+                if self._data.is_pending(1) or self._data.empty():
+                    break
+                self._record = self._data.copy()
+                self._items = self._decoder.decode(self._data,
+                        dict(self._context), self._name)
+                self._is_empty = True
+            for item in self._items:
+                if item[2] is None:
+                    # The decode has been suspended until more data arrives.
+                    return result
+                if self._is_empty and not item[0] and len(item[3]):
+                    self._is_empty = False
+                result.append(item)
+            if self._is_empty:
+                # The last event is the end of the record's entry.
+                raise EmptyRecordError(result[-1][2])
+            self._items = None
+        return result
+
+
+class RecordStream(EventStream):
+    """Push style decoder that returns completed records."""
+    def __init__(self, decoder, context={}, name=None):
+        EventStream.__init__(self, decoder, context, name)
+        self._events = []
+        self._depth = 0
+
+    def feed(self, bytes):
+        """Add data to the stream.
+
+        Returns a list of the records completed by the data, where each
+        record is a list of (is_starting, name, entry, data, value) tuples.
+        The records returned by the previous call to feed are released, so
+        should no longer be used.
+        """
+        return self._records(EventStream.feed(self, bytes))
+
+    def close(self):
+        """Indicate that no more data will arrive.
+
+        Returns a list of the remaining records. Raises a DecodeError if the
+        data doesn't end on a record boundary.
+        """
+        return self._records(EventStream.close(self))
+
+    def _records(self, events):
+        result = []
+        for event in events:
+            self._events.append(event)
+            if event[0]:
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    result.append(self._events)
+                    self._events = []
+        return result
+
+
+class RecordDispatcher(asyncore.dispatcher):
+    """An asyncore dispatcher that decodes records from a socket.
+
+    Derived classes should implement handle_record, which will be called for
+    each record as soon as it has been decoded. Decode errors are passed to
+    handle_error (which by default closes the connection).
+    """
+    read_size = 65536
+
+    def __init__(self, decoder, sock=None, map=None, context={}, name=None):
+        asyncore.dispatcher.__init__(self, sock, map)
+        self._stream = RecordStream(decoder, context, name)
+
+    def handle_record(self, items):
+        raise NotImplementedError()
+
+    def handle_read(self):
+        bytes = self.recv(self.read_size)
+        if bytes:
+            for items in self._stream.feed(bytes):
+                self.handle_record(items)
+
+    def handle_close(self):
+        try:
+            for items in self._stream.close():
+                self.handle_record(items)
+        finally:
+            self.close()
+
+    def writable(self):
+        return False
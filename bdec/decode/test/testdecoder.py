@@ -0,0 +1,174 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import StringIO
+import unittest
+
+import bdec
+from bdec.choice import Choice
+import bdec.data as dt
+from bdec.decode import COLLECT, Decoder, EmptyRecordError, SKIP
+from bdec.decode.index import create_index, InvalidIndexError, RecordIndex, \
+        spec_hash, StaleIndexError
+from bdec.decode.skim import SkipDecoder
+from bdec.entry import DecodeLengthError
+from bdec.expression import parse
+from bdec.field import Field
+from bdec.sequence import Sequence
+from bdec.test.testdata import NonSeekable
+
+def _values(items):
+    return [(name, value) for is_starting, name, entry, data, value in items
+            if not is_starting and isinstance(entry, Field)]
+
+class TestIterRecords(unittest.TestCase):
+    def _length_prefixed(self):
+        length = Field('length', 8, format=Field.INTEGER)
+        body = Field('body', length=parse('${length} * 8'), format=Field.TEXT)
+        return Sequence('record', [length, body])
+
+    def test_records(self):
+        decoder = Decoder(self._length_prefixed())
+        records = list(decoder.iter_records(dt.Data('\x03abc\x01d\x00')))
+        self.assertEqual(3, len(records))
+        self.assertEqual([('length', 3), ('body', 'abc')], _values(records[0]))
+        self.assertEqual([('length', 1), ('body', 'd')], _values(records[1]))
+        self.assertEqual([('length', 0), ('body', '')], _values(records[2]))
+
+    def test_no_records(self):
+        decoder = Decoder(self._length_prefixed())
+        self.assertEqual([], list(decoder.iter_records(dt.Data(''))))
+
+    def test_empty_record(self):
+        decoder = Decoder(Sequence('empty', []))
+        records = decoder.iter_records(dt.Data('\x01'))
+        self.assertRaises(EmptyRecordError, list, records)
+
+    def test_stream_is_released(self):
+        decoder = Decoder(self._length_prefixed())
+        data = dt.Data(NonSeekable('\x03abc' * 100))
+        for i, items in enumerate(decoder.iter_records(data)):
+            self.assertEqual([('length', 3), ('body', 'abc')], _values(items))
+            # Only the current record should be held in memory.
+            self.assertTrue(len(data._buffer._buffer) <= 4)
+        self.assertEqual(99, i)
+
+
+class TestRecordIndex(unittest.TestCase):
+    def _record(self):
+        header = Sequence('header', [
+            Field('type', 8, format=Field.INTEGER),
+            Field('length', 8, format=Field.INTEGER)])
+        body = Field('body', length=parse('${header.length} * 8'), format=Field.TEXT)
+        return Sequence('record', [header, Field('flags', 4), Field('unused', 4), body])
+
+    def test_skim_records(self):
+        decoder = Decoder(self._record())
+        data = dt.Data('\x01\x03\x00abc\x02\x01\x00d\x03\x00\x00')
+        self.assertEqual([0, 48, 80], list(decoder.skim_records(data)))
+
+    def test_skim_skips_unreferenced_entries(self):
+        decoder = Decoder(self._record())
+        list(decoder.skim_records(dt.Data('\x01\x03\x00abc')))
+        skipped = [isinstance(child.decoder, SkipDecoder) for child in
+                decoder._skimmer.children]
+        self.assertEqual([False, True, True, True], skipped)
+
+    def test_skim_truncated_record(self):
+        decoder = Decoder(self._record())
+        data = dt.Data('\x01\x03\x00abc\x02\x05\x00d')
+        self.assertRaises(bdec.DecodeError, list, decoder.skim_records(data))
+
+    def test_skim_empty_record(self):
+        decoder = Decoder(Sequence('empty', []))
+        offsets = decoder.skim_records(dt.Data('\x01'))
+        self.assertRaises(EmptyRecordError, list, offsets)
+
+    def test_decode_at(self):
+        decoder = Decoder(self._record())
+        data = dt.Data('\x01\x03\x00abc\x02\x01\x00d\x03\x00\x00')
+        index = create_index(decoder, data.copy())
+        self.assertEqual(3, len(index))
+        self.assertEqual([('type', 2), ('length', 1), ('flags', None),
+            ('unused', None), ('body', 'd')],
+            [(name, value if not isinstance(value, dt.Data) else None)
+                for name, value in _values(decoder.decode_at(index, 1, data))])
+
+    def test_save_and_load(self):
+        decoder = Decoder(self._record())
+        index = create_index(decoder, dt.Data('\x01\x03\x00abc\x02\x01\x00d'))
+        buffer = StringIO.StringIO()
+        index.save(buffer)
+        buffer.seek(0)
+        loaded = RecordIndex.load(buffer)
+        self.assertEqual([0, 48], list(loaded.offsets))
+        self.assertEqual(decoder.spec_hash(), loaded.spec_hash)
+
+    def test_invalid_index_file(self):
+        self.assertRaises(InvalidIndexError, RecordIndex.load, StringIO.StringIO('BDIX'))
+        self.assertRaises(InvalidIndexError, RecordIndex.load, StringIO.StringIO('x' * 34))
+
+    def test_stale_index(self):
+        data = dt.Data('\x01\x03\x00abc')
+        index = create_index(Decoder(self._record()), data.copy())
+        other = Sequence('record', [Field('a', 8)])
+        self.assertRaises(StaleIndexError, Decoder(other).decode_at, index, 0, data)
+
+    def test_spec_hash_of_recursive_entry(self):
+        a = Sequence('a', [])
+        b = Choice('b', [a, Field('c', 8)])
+        a.children = [Field('d', 8), b]
+        self.assertEqual(spec_hash(a), spec_hash(a))
+        self.assertNotEqual(spec_hash(a), spec_hash(b))
+
+
+class TestDecodeMany(unittest.TestCase):
+    def _decoder(self, format=Field.TEXT):
+        length = Field('length', 8, format=Field.INTEGER)
+        body = Field('body', length=parse('${length} * 8'), format=format)
+        return Decoder(Sequence('record', [length, body]))
+
+    def test_messages(self):
+        results = list(self._decoder().decode_many(['\x03abc', '\x00', '\x01d']))
+        self.assertEqual([('length', 3), ('body', 'abc')], _values(results[0]))
+        self.assertEqual([('length', 0), ('body', '')], _values(results[1]))
+        self.assertEqual([('length', 1), ('body', 'd')], _values(results[2]))
+
+    def test_raise(self):
+        results = self._decoder().decode_many(['\x01a', '\x03ab'])
+        self.assertEqual([('length', 1), ('body', 'a')], _values(results.next()))
+        self.assertRaises(bdec.DecodeError, results.next)
+
+    def test_skip(self):
+        results = self._decoder().decode_many(['\x03ab', '\x01a', '\x01ab'],
+                errors=SKIP)
+        self.assertEqual([[('length', 1), ('body', 'a')]],
+                [_values(items) for items in results])
+
+    def test_collect(self):
+        results = list(self._decoder().decode_many(['\x03ab', '\x01a', '\x01ab'],
+                errors=COLLECT))
+        self.assertTrue(isinstance(results[0], bdec.DecodeError))
+        self.assertEqual([('length', 1), ('body', 'a')], _values(results[1]))
+        self.assertTrue(isinstance(results[2], DecodeLengthError))
+
+    def test_binary_past_end_of_message(self):
+        results = list(self._decoder(Field.BINARY).decode_many(['\x01a', '\x02a'],
+                errors=COLLECT))
+        self.assertEqual('a', _values(results[0])[1][1].bytes())
+        self.assertTrue(isinstance(results[1], bdec.DecodeError))
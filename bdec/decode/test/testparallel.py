@@ -0,0 +1,103 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+
+from bdec.decode import Decoder
+from bdec.decode.index import create_index, RecordIndex, StaleIndexError
+import bdec.decode.parallel as parallel
+import bdec.data as dt
+
+_SPEC = """<protocol>
+  <sequence name="record">
+    <field name="length" length="8" type="integer" />
+    <field name="body" length="${length} * 8" type="text" />
+  </sequence>
+</protocol>"""
+
+class TestParallelDecode(unittest.TestCase):
+    def setUp(self):
+        self._files = []
+        self.spec = self._create_file(_SPEC, '.xml')
+
+    def tearDown(self):
+        for filename in self._files:
+            os.remove(filename)
+
+    def _create_file(self, contents, suffix):
+        handle, filename = tempfile.mkstemp(suffix)
+        os.write(handle, contents)
+        os.close(handle)
+        self._files.append(filename)
+        return filename
+
+    def _decode(self, data, offsets, **kwargs):
+        filename = self._create_file(data, '.bin')
+        return list(parallel.decode([self.spec], filename, offsets, jobs=2, **kwargs))
+
+    def test_xml_records_in_order(self):
+        records = self._decode('\x03abc\x01d\x00\x02ef', [0, 32, 48, 56],
+                chunk_size=1)
+        self.assertEqual(4, len(records))
+        self.assertEqual('<record>\n    <length>3</length>\n    <body>abc</body>\n</record>\n', records[0])
+        self.assertTrue('<body>ef</body>' in records[3])
+
+    def test_instances(self):
+        records = self._decode('\x01a' * 100, 16, format=parallel.INSTANCE,
+                chunk_size=7)
+        self.assertEqual(100, len(records))
+        self.assertEqual([(1, 'a')] * 100, [(r.length, r.body) for r in records])
+
+    def test_record_index(self):
+        data = '\x02ab\x00\x01c' * 10
+        spec = parallel.load_specs([self.spec])[0]
+        index = create_index(Decoder(spec), dt.Data(data))
+        records = self._decode(data, index, format=parallel.INSTANCE)
+        self.assertEqual(['ab', '', 'c'] * 10, [r.body for r in records])
+
+    def test_stale_record_index(self):
+        data = '\x02ab\x00\x01c'
+        spec = parallel.load_specs([self.spec])[0]
+        index = create_index(Decoder(spec), dt.Data(data))
+        stale = RecordIndex(index.offsets, '\x00' * len(index.spec_hash))
+        self.assertRaises(StaleIndexError, self._decode, data, stale)
+
+    def test_empty_file(self):
+        self.assertEqual([], self._decode('', 16))
+
+    def test_bad_record(self):
+        filename = self._create_file('\x01a\x01a\x05a', '.bin')
+        records = parallel.decode([self.spec], filename, 16, jobs=2,
+                format=parallel.INSTANCE, chunk_size=1)
+        self.assertEqual('a', records.next().body)
+        self.assertEqual('a', records.next().body)
+        try:
+            records.next()
+            self.fail('Expected a RecordDecodeError')
+        except parallel.RecordDecodeError, ex:
+            self.assertEqual(2, ex.record)
+
+    def test_record_with_unused_data(self):
+        try:
+            self._decode('\x01ab', 24)
+            self.fail('Expected a RecordDecodeError')
+        except parallel.RecordDecodeError, ex:
+            self.assertEqual(0, ex.record)
+            self.assertTrue('left 8 bits' in str(ex))
@@ -0,0 +1,107 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import StringIO
+import unittest
+
+from bdec.choice import Choice
+from bdec.constraints import Equals
+import bdec.data as dt
+from bdec.decode import Decoder
+from bdec.decode.profile import Profiler
+from bdec.expression import parse
+from bdec.field import Field
+from bdec.sequence import Sequence
+from bdec.sequenceof import SequenceOf
+
+class TestProfiler(unittest.TestCase):
+    def test_entry_stats(self):
+        byte = Field('byte', 8, format=Field.INTEGER)
+        bytes = SequenceOf('bytes', byte, parse('3'))
+        record = Sequence('record', [Field('a', 4), bytes, Field('b', 4)])
+        profiler = Profiler({byte:('spec.xml', 4, 2)})
+        items = list(Decoder(record, profiler).decode(dt.Data('\x00abc\x00'), {}, None))
+        self.assertEqual(14, len(items))
+
+        stats = profiler.stats
+        self.assertEqual(1, stats[record].calls)
+        self.assertEqual(3, stats[byte].calls)
+        self.assertEqual(32, stats[record].bits)
+        self.assertEqual(24, stats[bytes].bits)
+        self.assertEqual(24, stats[byte].bits)
+        self.assertEqual(('spec.xml', 4, 2), stats[byte].location)
+        self.assertEqual(('unknown', 0, 0), stats[record].location)
+        self.assertTrue(stats[record].inclusive >= stats[bytes].inclusive)
+        self.assertTrue(stats[bytes].inclusive >= stats[byte].inclusive)
+        self.assertTrue(stats[record].exclusive <= stats[record].inclusive)
+
+    def test_choice_trial_decodes_are_profiled(self):
+        # The chooser cannot distinguish between the options using the
+        # sequence values, so they have to be trial decoded.
+        a = Sequence('a', [Field('x', 8, format=Field.INTEGER)],
+                value=parse('${x}'), constraints=[Equals(1)])
+        b = Sequence('b', [Field('x', 8, format=Field.INTEGER)],
+                value=parse('${x}'), constraints=[Equals(2)])
+        choice = Choice('choice', [a, b])
+        profiler = Profiler()
+        list(Decoder(choice, profiler).decode(dt.Data('\x02'), {}, None))
+        self.assertEqual(1, profiler.stats[a].calls)
+        self.assertEqual(2, profiler.stats[b].calls)
+
+    def test_report(self):
+        byte = Field('byte', 8, format=Field.INTEGER)
+        profiler = Profiler({byte:('spec.xml', 4, 2)})
+        list(Decoder(SequenceOf('bytes', byte, parse('2')), profiler).decode(
+            dt.Data('ab'), {}, None))
+        output = StringIO.StringIO()
+        profiler.report(output, 1)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertTrue('entry' in lines[0])
+
+    def test_profiling_is_disabled_by_default(self):
+        decoder = Decoder(Field('byte', 8))
+        self.assertEqual('FieldDecoder', decoder._decoder.__class__.__name__)
+
+    def test_choice_stats(self):
+        a = Sequence('a', [Field('x', 8, format=Field.INTEGER)],
+                value=parse('${x}'), constraints=[Equals(1)])
+        b = Sequence('b', [Field('x', 8, format=Field.INTEGER)],
+                value=parse('${x}'), constraints=[Equals(2)])
+        trial = Choice('trial', [a, b])
+        c = Field('c', 8, constraints=[Equals(dt.Data('c'))])
+        d = Field('d', 8, constraints=[Equals(dt.Data('d'))])
+        chosen = Choice('chosen', [c, d])
+        profiler = Profiler({trial:('spec.xml', 7, 4)})
+        decoder = Decoder(SequenceOf('items', Sequence('item', [trial, chosen]),
+            parse('2')), profiler)
+        list(decoder.decode(dt.Data('\x02d\x01c'), {}, None))
+
+        stats = profiler.choices[trial]
+        self.assertEqual((0, 0, 2), (stats.none, stats.single, stats.multiple))
+        self.assertEqual(3, stats.trials)
+        self.assertEqual(24, stats.discarded_bits)
+        stats = profiler.choices[chosen]
+        self.assertEqual((0, 2, 0, 0), (stats.none, stats.single,
+            stats.multiple, stats.trials))
+
+        output = StringIO.StringIO()
+        profiler.report_choices(output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertTrue(lines[1].endswith("choice 'trial' (spec.xml[7])"))
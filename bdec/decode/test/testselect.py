@@ -0,0 +1,94 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from bdec.choice import Choice
+from bdec.constraints import Equals
+import bdec.data as dt
+from bdec.decode import Decoder
+from bdec.decode.select import UnknownPathError
+from bdec.expression import parse
+from bdec.field import Field
+import bdec.output.instance as instance
+from bdec.sequence import Sequence
+from bdec.sequenceof import SequenceOf
+
+def _record():
+    length = Field('length', 8, format=Field.INTEGER)
+    return Sequence('record', [
+        length,
+        Field('text', parse('${length} * 8'), format=Field.TEXT),
+        Sequence('header', [Field('a', 8, format=Field.INTEGER),
+            Field('b', 8, format=Field.INTEGER)]),
+        SequenceOf('items', Choice('item', [
+            Sequence('x', [Field('id:', 8, constraints=[Equals(1)]),
+                Field('value', 8, format=Field.INTEGER)]),
+            Sequence('y', [Field('id:', 8, constraints=[Equals(2)]),
+                Field('data', 16, format=Field.HEX)])]), 2)])
+
+class TestSelect(unittest.TestCase):
+    def _decode(self, select, data='\x03cat\x05\x06\x01\x07\x02\xab\xcd'):
+        return list(Decoder(_record(), select=select).decode(dt.Data(data), {}, None))
+
+    def test_select_field(self):
+        items = self._decode(['record.header.b'])
+        value = instance.get_instance(items)
+        self.assertEqual(6, value.header.b)
+        self.assertFalse(hasattr(value.header, 'a'))
+        self.assertFalse(hasattr(value, 'items'))
+        self.assertEqual(['length:', 'text:', 'a:', 'items:'],
+                [name for is_starting, name, entry, data, value in items
+                    if is_starting and name.endswith(':')])
+
+    def test_unselected_entries_are_skipped(self):
+        items = self._decode(['record.header.b'])
+        ends = dict((name, (data, value)) for is_starting, name, entry, data, value
+                in items if not is_starting)
+        # The text can be skipped, as its length is known once the length
+        # field is decoded; the length field must still be decoded.
+        self.assertEqual((dt.Data('cat'), None), ends['text:'])
+        self.assertEqual((dt.Data('\x03'), None), ends['length:'])
+        self.assertEqual(dt.Data('\x01\x07\x02\xab\xcd'), ends['items:'][0])
+
+    def test_select_through_choice(self):
+        value = instance.get_instance(self._decode(['record.items.item.value']))
+        self.assertEqual(2, len(value.items))
+        self.assertEqual(7, value.items[0].x.value)
+        # The second item's option had nothing selected
+        self.assertFalse(hasattr(value.items[1], 'y'))
+
+    def test_select_option(self):
+        value = instance.get_instance(self._decode(['record.items.item.y']))
+        self.assertFalse(hasattr(value.items[0], 'x'))
+        self.assertEqual('abcd', str(value.items[1].y.data))
+
+    def test_select_whole_entry(self):
+        value = instance.get_instance(self._decode(['record.header', 'record.text']))
+        self.assertEqual('cat', value.text)
+        self.assertEqual((5, 6), (value.header.a, value.header.b))
+
+    def test_decode_length_is_unchanged(self):
+        decoder = Decoder(_record(), select=['record.header.a'])
+        data = dt.Data('\x03cat\x05\x06\x01\x07\x02\xab\xcd\xff')
+        list(decoder.decode(data, {}, None))
+        self.assertEqual(dt.Data('\xff'), data)
+
+    def test_unknown_path(self):
+        self.assertRaises(UnknownPathError, Decoder, _record(), select=['record.missing'])
+        self.assertRaises(UnknownPathError, Decoder, _record(), select=['header.a'])
@@ -0,0 +1,163 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import asyncore
+import socket
+import unittest
+
+import bdec
+from bdec.choice import Choice
+from bdec.constraints import Equals
+import bdec.data as dt
+from bdec.decode import Decoder, EmptyRecordError
+from bdec.decode.stream import EventStream, RecordDispatcher, RecordStream
+from bdec.expression import parse
+from bdec.field import Field
+from bdec.sequence import Sequence
+from bdec.sequenceof import SequenceOf
+
+def _values(items):
+    return [(name, value) for is_starting, name, entry, data, value in items
+            if not is_starting and isinstance(entry, Field)]
+
+def _length_prefixed(format=Field.TEXT):
+    length = Field('length', 8, format=Field.INTEGER)
+    body = Field('body', length=parse('${length} * 8'), format=format)
+    return Sequence('record', [length, body])
+
+class TestRecordStream(unittest.TestCase):
+    def test_fragmented_records(self):
+        stream = RecordStream(Decoder(_length_prefixed()))
+        records = []
+        for char in '\x03abc\x01d\x00\x02ef':
+            records.extend(_values(items) for items in stream.feed(char))
+        records.extend(_values(items) for items in stream.close())
+        self.assertEqual([
+            [('length', 3), ('body', 'abc')],
+            [('length', 1), ('body', 'd')],
+            [('length', 0), ('body', '')],
+            [('length', 2), ('body', 'ef')]], records)
+
+    def test_records_returned_when_completed(self):
+        stream = RecordStream(Decoder(_length_prefixed()))
+        self.assertEqual([], stream.feed('\x03a'))
+        self.assertEqual([], stream.feed('b'))
+        records = stream.feed('c\x01d\x02')
+        self.assertEqual(2, len(records))
+        self.assertEqual([('length', 1), ('body', 'd')], _values(records[1]))
+
+    def test_incomplete_record_on_close(self):
+        stream = RecordStream(Decoder(_length_prefixed()))
+        self.assertEqual([], stream.feed('\x03ab'))
+        self.assertRaises(bdec.DecodeError, stream.close)
+
+    def test_binary_field(self):
+        # Binary fields aren't read when decoded, so the stream must wait
+        # until all of the record's data has arrived.
+        stream = RecordStream(Decoder(_length_prefixed(Field.BINARY)))
+        self.assertEqual([], stream.feed('\x02\x01'))
+        records = stream.feed('\x02')
+        self.assertEqual(1, len(records))
+        self.assertEqual('\x01\x02', _values(records[0])[1][1].bytes())
+
+    def test_choice_waits_for_data(self):
+        # When only the first two bytes have arrived the 'short' option would
+        # decode, but the 'long' option is correct once all data arrives.
+        long = Sequence('long', [Field('a', 8, constraints=[Equals(dt.Data('a'))]),
+            Field('b', 8), Field('c', 8, constraints=[Equals(dt.Data('c'))])])
+        short = Sequence('short', [Field('a', 8, constraints=[Equals(dt.Data('a'))]),
+            Field('b', 8)])
+        stream = RecordStream(Decoder(Choice('record', [long, short])))
+        self.assertEqual([], stream.feed('ab'))
+        records = stream.feed('c')
+        self.assertEqual(1, len(records))
+        self.assertEqual(['a', 'b', 'c'], [name for name, value in _values(records[0])])
+
+    def test_decode_error(self):
+        decoder = Decoder(Sequence('record', [Field('a', 8, constraints=[Equals(dt.Data('a'))])]))
+        stream = RecordStream(decoder)
+        self.assertEqual(1, len(stream.feed('a')))
+        self.assertRaises(bdec.DecodeError, stream.feed, 'b')
+
+
+class TestEventStream(unittest.TestCase):
+    def test_events_returned_as_decoded(self):
+        stream = EventStream(Decoder(_length_prefixed()))
+        events = stream.feed('\x03a')
+        self.assertEqual([(True, 'record'), (True, 'length'), (False, 'length'),
+            (True, 'body')], [(e[0], e[1]) for e in events])
+        self.assertEqual([], stream.feed('b'))
+        events = stream.feed('c')
+        self.assertEqual([(False, 'body', 'abc'), (False, 'record', None)],
+                [(e[0], e[1], e[4]) for e in events])
+        self.assertEqual([], stream.close())
+
+    def test_fragments_are_not_decoded_again(self):
+        byte = Field('byte', 8, format=Field.INTEGER)
+        calls = []
+        decode_value = byte.decode_value
+        def counted(data):
+            calls.append(data)
+            return decode_value(data)
+        byte.decode_value = counted
+        stream = EventStream(Decoder(SequenceOf('bytes', byte, 100)))
+        events = []
+        for i in range(100):
+            events.extend(stream.feed(chr(i)))
+        events.extend(stream.close())
+        self.assertEqual(100, len(calls))
+        self.assertEqual(range(100), [e[4] for e in events
+            if not e[0] and e[1] == 'byte'])
+
+    def test_sequenceof_until_stream_closed(self):
+        byte = Field('byte', 8, format=Field.INTEGER)
+        stream = EventStream(Decoder(SequenceOf('bytes', byte, None)))
+        self.assertEqual(7, len(stream.feed('abc')))
+        self.assertEqual(2, len(stream.feed('d')))
+        events = stream.close()
+        self.assertEqual([(False, 'bytes')], [(e[0], e[1]) for e in events])
+
+    def test_empty_record(self):
+        stream = EventStream(Decoder(Sequence('empty', [])))
+        self.assertRaises(EmptyRecordError, stream.feed, '\x01')
+
+
+class _Collector(RecordDispatcher):
+    def __init__(self, *args, **kwargs):
+        RecordDispatcher.__init__(self, *args, **kwargs)
+        self.records = []
+
+    def handle_record(self, items):
+        self.records.append(_values(items))
+
+class TestRecordDispatcher(unittest.TestCase):
+    def test_socket(self):
+        map = {}
+        a, b = socket.socketpair()
+        dispatcher = _Collector(Decoder(_length_prefixed()), a, map)
+        b.send('\x03ab')
+        asyncore.loop(0.01, map=map, count=2)
+        self.assertEqual([], dispatcher.records)
+        b.send('c\x01')
+        asyncore.loop(0.01, map=map, count=2)
+        self.assertEqual([[('length', 3), ('body', 'abc')]], dispatcher.records)
+        b.send('d')
+        b.close()
+        asyncore.loop(0.01, map=map, count=5)
+        self.assertEqual(2, len(dispatcher.records))
+        self.assertEqual({}, map)
@@ -45,6 +45,7 @@
 import logging
 
 from bdec import DecodeError
+from bdec.choice import Choice
 from bdec.constraints import Equals, Minimum, Maximum
 from bdec.encode.entry import EntryEncoder, MissingInstanceError
 from bdec.expression import ReferenceExpression, ArithmeticExpression
@@ -129,6 +130,11 @@ def get_default_option_params(choice, child, expression_params, encode_expressio
     return result
 
 class ChoiceEncoder(EntryEncoder):
+    def __init__(self, entry, encode_expression_params, params, is_hidden):
+        EntryEncoder.__init__(self, entry, encode_expression_params, params, is_hidden)
+        self._is_named = None
+        self._default_params = {}
+
     def _get_value(self, query, parent, offset, name, context):
         try:
             return query(parent, self.entry, offset, name)
@@ -136,18 +142,55 @@ class ChoiceEncoder(EntryEncoder):
             # Choice entries can be completely hidden
             return parent
 
+    def _is_present(self, child, query, value):
+        """Check if the value of an option is present.
+
+        Visible options (other than choices, which are transparent) can only
+        be encoded if their value is found by name.
+        """
+        if self._is_named is None:
+            self._is_named = dict((c, not c.is_hidden and
+                not c.encoder.is_hidden and
+                not isinstance(c.child.entry, Choice)) for c in self.children)
+        if not self._is_named[child]:
+            return True
+        try:
+            query(value, child.child.entry, 0, child.name)
+            return True
+        except MissingInstanceError:
+            return False
+
+    def _get_default_params(self, child):
+        # The defaults depend only on the specification, so they are only
+        # calculated once for each option.
+        try:
+            return self._default_params[child]
+        except KeyError:
+            result = get_default_option_params(self.entry, child.child,
+                    self._params, self._encode_expression_params)
+            self._default_params[child] = result
+            return result
 
     def _encode(self, query, value, context):
         # We attempt to encode all of the embedded items, until we find
         # an encoder capable of doing it. We try the visible items first, as
-        # the hidden entries will usually succeed regardless.
-        visible = [c for c in self.children if not c.is_hidden]
-        hidden = [c for c in self.children if c.is_hidden]
+        # the hidden entries will usually succeed regardless. Visible options
+        # whose value isn't present cannot be encoded, so aren't tried.
         children = sorted(self.children, key=lambda c:c.is_hidden)
 
         best_guess = None
         best_guess_value = None
         for child in children:
+            if not self.is_hidden and not self._is_present(child, query, value):
+                if best_guess is None:
+                    best_guess = child
+                    best_guess_value = (0, 0)
+                continue
+
+            # The trial output (and the context it populates) is kept, so
+            # the successful option doesn't have to be encoded again.
+            trial_context = context.copy()
+            encoded = []
             try:
                 bits_encoded = 0
                 num_entries = [0]
@@ -155,18 +198,22 @@ class ChoiceEncoder(EntryEncoder):
                     result = query(obj, child, i, name)
                     num_entries[0] += 1
                     return result
-                for data in self._encode_child(child, mock_query, value, 0, context):
+                for data in self._encode_child(child, mock_query, value, 0, trial_context):
                     bits_encoded += len(data)
-
-                # We successfully encoded the entry!
-                best_guess = child
-                break
+                    encoded.append(data)
             except DecodeError:
                 rating = (bits_encoded, num_entries[0])
                 if best_guess is None or rating > best_guess_value:
                     best_guess = child
                     best_guess_value = rating
+            else:
+                # We successfully encoded the entry!
+                context.update(trial_context)
+                context.update(self._get_default_params(child))
+                return encoded
 
+        # None of the options could be encoded; encode the best guess again
+        # to report the error.
         result = self._encode_child(best_guess, query, value, 0, context)
-        context.update(get_default_option_params(self.entry, best_guess.child, self._params, self._encode_expression_params))
+        context.update(self._get_default_params(best_guess))
         return result
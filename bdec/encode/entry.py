@@ -51,7 +51,7 @@ from bdec.expression import Constant
 from bdec.field import Field
 from bdec.sequence import Sequence
 from bdec.sequenceof import SequenceOf
-from bdec.inspect.solver import solve, SolverError
+from bdec.inspect.solver import Solver, SolverError
 
 class DataLengthError(bdec.DecodeError):
     """Encoded data has the wrong length."""
@@ -154,13 +154,22 @@ class EntryEncoder:
         self._params = encode_expression_params.expression_params
         self._is_length_referenced = self._params.is_length_referenced(entry)
         self._is_value_referenced = self._params.is_value_referenced(entry)
+        self._solvers = {}
+
+        # Objects used to query the values to encode (eg: by
+        # bdec.output.instance), which can cache lookups for this encoder.
+        self.queries = {}
 
     def _solve(self, expression, value, context):
         '''Solve an expression given the result and context.
 
         Will throw a bdec.inspect.solver.SolverError if the expression cannot
         be resolved correctly.'''
-        ref_values = solve(expression, self.entry, self._params, context, value)
+        try:
+            solver = self._solvers[expression]
+        except KeyError:
+            solver = self._solvers[expression] = Solver(expression, self.entry, self._params)
+        ref_values = solver.solve(context, value)
 
         for ref, ref_value in ref_values.items():
             context[ref.name] = ref_value
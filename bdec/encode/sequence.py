@@ -43,7 +43,6 @@
 #   SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from collections import defaultdict
-import operator
 
 from bdec import DecodeError
 from bdec.constraints import Equals
@@ -192,10 +191,20 @@ class SequenceEncoder(EntryEncoder):
                 raise MissingValueError(self.entry)
             self._solve(self.entry.value, int(value), context)
 
+        # Children that are encoded in order are output as they are encoded;
+        # only the children encoded ahead of an earlier child are buffered.
+        children = self.children
+        next = 0
         sequence_data = {}
         for child in self.order():
-            data = reduce(operator.add, self._encode_child(child, query, value, 0, context), Data())
-            sequence_data[child] = data
-        for child in self.children:
-            yield sequence_data[child]
+            if child is not children[next]:
+                sequence_data[child] = Data.join(self._encode_child(child, query, value, 0, context))
+                continue
+
+            for data in self._encode_child(child, query, value, 0, context):
+                yield data
+            next += 1
+            while next < len(children) and children[next] in sequence_data:
+                yield sequence_data.pop(children[next])
+                next += 1
 
@@ -22,8 +22,9 @@ from bdec.data import Data
 from bdec.entry import Entry, Child
 from bdec.expression import ValueResult, Constant
 from bdec.field import Field
-from bdec.output.instance import encode
+from bdec.output.instance import encode, _Query
 from bdec.sequence import Sequence
+import operator
 import unittest
 
 class TestChoice(unittest.TestCase):
@@ -44,3 +45,38 @@ class TestChoice(unittest.TestCase):
             ])
         self.assertEqual(Data('\x01\x00'), encode(a, {'c':0}))
         self.assertEqual(Data('\x01\x01'), encode(a, {'d':None}))
+
+    def _encode_counting_queries(self, entry, value):
+        queries = {}
+        get_value = _Query()
+        def query(obj, child, i, name):
+            queries[name] = queries.get(name, 0) + 1
+            return get_value(obj, child, i, name)
+        data = reduce(operator.add, entry.encode(query, {entry.name: value}), Data())
+        return data, queries
+
+    def test_successful_option_is_not_encoded_twice(self):
+        a = Choice('a', [
+            Sequence('b', [Field('c', length=8, format=Field.INTEGER)]),
+            Sequence('d', [Field('e', length=8, format=Field.INTEGER)])])
+        data, queries = self._encode_counting_queries(a, {'d': {'e': 7}})
+        self.assertEqual(Data('\x07'), data)
+        self.assertEqual(1, queries['e'])
+
+    def test_missing_options_are_not_tried(self):
+        a = Choice('a', [
+            Sequence('b', [Field('c', length=8, format=Field.INTEGER)]),
+            Field('d', length=8, format=Field.INTEGER)])
+        data, queries = self._encode_counting_queries(a, {'d': 7})
+        self.assertEqual(Data('\x07'), data)
+        self.assertEqual(1, queries['b'])
+        self.assertTrue('c' not in queries)
+
+    def test_nested_choice_options_are_found(self):
+        a = Choice('a', [
+            Choice('b', [
+                Field('c', length=8, constraints=[Equals(1)]),
+                Field('d', length=8, constraints=[Equals(2)])]),
+            Field('e', length=8, constraints=[Equals(3)])])
+        self.assertEqual(Data('\x02'), encode(a, {'d': None}))
+        self.assertEqual(Data('\x03'), encode(a, {'e': None}))
@@ -170,12 +170,22 @@ class Entry(object):
         self._validate()
         return self._decoder.decode(data, context, name)
 
-    def encode(self, query, value):
+    def decode_many(self, messages, errors='raise', context={}, name=None):
+        """ Shortcut to bdec.decode.Decoder(self).decode_many """
+        self._validate()
+        return self._decoder.decode_many(messages, errors, context, name)
+
+    def get_encoder(self):
+        """Get the bdec.encode encoder for this entry."""
         if self._encoder is None:
             from bdec.encode import create_encoder
             self._encoder = create_encoder(self)
-        value = self._encoder.get_value(query, value, 0, self.name, {})
-        return self._encoder.encode(query, value, 0, {}, self.name)
+        return self._encoder
+
+    def encode(self, query, value):
+        encoder = self.get_encoder()
+        value = encoder.get_value(query, value, 0, self.name, {})
+        return encoder.encode(query, value, 0, {}, self.name)
 
     def is_hidden(self):
         """Is this a 'hidden' entry."""
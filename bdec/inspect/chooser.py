@@ -315,9 +315,16 @@ class Chooser:
         self._cache = _Cache(entries)
 
     def choose(self, data):
+        """Return the entries that may be able to decode the data.
+
+        Returns None if the data needed to choose hasn't arrived yet (see
+        bdec.data.Data.is_pending).
+        """
         options = list(self._entries)
         current_offset = 0
         copy = data.copy()
+        # Only stream data can be pending, so check it once up front.
+        is_stream = data.is_stream()
         for offset, length, lookup, undistinguished, finished, possible_failure in self._cache:
             lookup_entries = set()
             for keyed_entries in lookup.values():
@@ -353,7 +360,11 @@ class Chooser:
 
             if length:
                 try:
-                    value = int(copy.pop(length))
+                    bits = copy.pop(length)
+                    if is_stream and bits.is_pending():
+                        # The data to choose with hasn't arrived yet.
+                        return None
+                    value = int(bits)
                     current_offset += length
                 except dt.NotEnoughDataError:
                     # We don't have enough data left for this option; reduce
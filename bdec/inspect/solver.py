@@ -268,38 +268,110 @@ def solve_expression(result_expr, expression, entry, params, input_params):
             params, input_params, remaining_range)))
     return constant, result_params
 
-def solve(expression, entry, params, context, value):
-    """Solve an expression given the result and the input parameters.
+def _compile(expression, name):
+    """Convert an expression into a function of (context, value).
 
-    expression -- A bdec.expression.Expression instance to solve.
-    params -- A bdec.param.ExpressionParameters instance used to query all
-        values passed into the expression.
-    value -- The integer value to use when solving the expression.
-    context -- A dict of (name:value) representing all known parameter
-        values that can be used for solving.
-    result -- Returns a dict of {ReferenceExpression: value} """
+    References to the parameter called 'name' evaluate to the value; other
+    references are looked up in the context.
+    """
+    if isinstance(expression, Constant):
+        constant = expression.value
+        return lambda context, value: constant
+    elif isinstance(expression, ReferenceExpression):
+        param_name = expression.param_name()
+        if param_name == name:
+            return lambda context, value: value
+        return lambda context, value: expression.evaluate(context)
+    elif isinstance(expression, ArithmeticExpression):
+        op = expression.op
+        left = _compile(expression.left, name)
+        right = _compile(expression.right, name)
+        return lambda context, value: op(left(context, value), right(context, value))
+    elif isinstance(expression, RoundUpDivisionExpression):
+        numerator = _compile(expression.numerator, name)
+        denominator = _compile(expression.denominator, name)
+        should_round_up = expression.should_round_up
+        def divide(context, value):
+            n = numerator(context, value)
+            d = denominator(context, value)
+            result = n / d
+            if n % d and should_round_up:
+                result += 1
+            return result
+        return divide
+    raise Exception("Unknown expression entry %s!" % expression)
 
-    # Figure out the components by working out each item independantly,
-    # starting with the most significant. We create a reference to a
-    # 'solve result' variable which we will reference in the inverted
-    # expressions.
-    solve_result = ValueResult('solve result')
-    constant, variables = solve_expression(solve_result, expression, entry, params, context.keys())
-    result = {}
-    original_value = value
-    value -= constant.evaluate(context)
-    for ref, expr, inverted_expr in variables:
-        # Work out a value for this variable
-        c = context.copy()
-        c[solve_result.name] = value
-        result[ref] = inverted_expr.evaluate(c)
+def _get_references(expression):
+    if isinstance(expression, ArithmeticExpression):
+        return _get_references(expression.left) | _get_references(expression.right)
+    elif isinstance(expression, ReferenceExpression):
+        return set([expression.param_name()])
+    return set()
+
+
+class Solver:
+    """Solve an expression given its result.
 
-        # Remove it's impact from the overall value so we can work out the next
-        # variable
-        c = context.copy()
-        c[ref.param_name()] = result[ref]
-        value -= expr.evaluate(c)
-    if value != 0:
-        raise UnsolvableExpressionError(entry, expression, original_value)
-    return result
+    The expression is broken apart and inverted once for each combination of
+    known parameters, so solving the same expression repeatedly (eg: when
+    encoding many records) doesn't repeat the work.
+    """
+    def __init__(self, expression, entry, params):
+        """Construct a solver.
+
+        expression -- A bdec.expression.Expression instance to solve.
+        entry -- The entry where this expression is used.
+        params -- A bdec.param.ExpressionParameters instance used to query all
+            values passed into the expression.
+        """
+        self.expression = expression
+        self.entry = entry
+        self._params = params
+        self._references = sorted(_get_references(expression))
+        self._plans = {}
 
+    def _create_plan(self, known):
+        solve_result = ValueResult('solve result')
+        constant, variables = solve_expression(solve_result, self.expression,
+                self.entry, self._params, known)
+        steps = []
+        for ref, expr, inverted_expr in variables:
+            steps.append((ref, _compile(inverted_expr, solve_result.name),
+                _compile(expr, ref.param_name())))
+        return _compile(constant, None), steps
+
+    def solve(self, context, value):
+        """Solve the expression for a given value.
+
+        context -- A dict of (name:value) representing all known parameter
+            values that can be used for solving.
+        value -- The integer value to use when solving the expression.
+        return -- A dict of {ReferenceExpression: value} """
+        known = tuple(name for name in self._references if name in context)
+        try:
+            constant, steps = self._plans[known]
+        except KeyError:
+            constant, steps = self._plans[known] = self._create_plan(known)
+
+        # Figure out the components by working out each item independantly,
+        # starting with the most significant.
+        result = {}
+        original_value = value
+        value -= constant(context, None)
+        for ref, inverted, component in steps:
+            # Work out a value for this variable, then remove it's impact
+            # from the overall value so we can work out the next variable.
+            result[ref] = inverted(context, value)
+            value -= component(context, result[ref])
+        if value != 0:
+            raise UnsolvableExpressionError(self.entry, self.expression, original_value)
+        return result
+
+def solve(expression, entry, params, context, value):
+    """Solve an expression given the result and the input parameters.
+
+    See Solver.solve; use a Solver instance when solving the same expression
+    many times.
+
+    result -- Returns a dict of {ReferenceExpression: value} """
+    return Solver(expression, entry, params).solve(context, value)
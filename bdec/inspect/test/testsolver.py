@@ -32,7 +32,7 @@ from bdec.entry import Child
 from bdec.expression import parse
 from bdec.field import Field
 from bdec.inspect.param import ExpressionParameters
-from bdec.inspect.solver import solve, SolverError
+from bdec.inspect.solver import solve, Solver, SolverError
 from bdec.inspect.type import EntryValueType
 from bdec.sequence import Sequence
 
@@ -181,3 +181,29 @@ class TestSolver (unittest.TestCase):
         self.assertEqual({'${most significant:}':1, '${least significant:}':1},
                 _solve(variable_length_integer, 1, 129))
 
+
+    def test_solver_is_reused(self):
+        a = Sequence('a', [
+            Field('signed:', 1),
+            Field('value:', 7),
+            Sequence('signed char', [], value=parse('(${signed:} * ((0-1) * 128)) + ${value:}'))
+            ])
+        entry = a.children[2].entry
+        solver = Solver(entry.value, entry, ExpressionParameters([a]))
+        for value in range(-128, 128):
+            result = dict((str(c), v) for c,v in solver.solve({}, value).items())
+            self.assertEqual({'${signed:}':int(value < 0), '${value:}':value & 0x7f}, result)
+
+    def test_solver_with_different_known_params(self):
+        a = Sequence('a', [
+            Field('total length:', length=8),
+            Field('partial length:', length=8),
+            Field('data:', length=parse('${partial length:} * 8')),
+            Sequence('unused', [], value=parse('${total length:} * 8 - len{data:}')),
+            ])
+        entry = a.children[3].entry
+        solver = Solver(entry.value, entry, ExpressionParameters([a]))
+        result = solver.solve({'total length:':100}, 0)
+        self.assertEqual({'len{data:}': 800}, dict((str(c), v) for c,v in result.items()))
+        result = solver.solve({'data: length':80}, 0)
+        self.assertEqual({'${total length:}': 10}, dict((str(c), v) for c,v in result.items()))
@@ -0,0 +1,373 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""Write repeated decoded entries as columns.
+
+Each item of a sequenceof (or each record, when decoding records) is
+treated as a row, and each visible field under the item becomes a column
+named by its path from the item (eg: 'header.width'). Integer and float
+columns are stored in array.array instances, so memory use is proportional
+to the number of columns (and the row group size) rather than the number
+of decoded entries. The rows are written in groups of a fixed size.
+
+Entries outside of the repeated entry, and sequenceofs nested inside an
+item, are not included in the columns.
+"""
+
+import array
+import csv
+import struct
+import sys
+
+import bdec.choice as chc
+import bdec.entry as ent
+import bdec.sequenceof as sof
+
+INTEGER = 'q'
+FLOAT = 'd'
+TEXT = 's'
+
+_MAGIC = 'BDECCOL\x01'
+
+# The array typecodes used to store the column values in memory. Integers
+# are written to file as 64 bit values, whatever the size of 'l'.
+_TYPECODES = {INTEGER:'l', FLOAT:'d'}
+
+class NewColumnError(Exception):
+    """Raised when a column first appears after the first group of rows."""
+    def __init__(self, name):
+        Exception.__init__(self, name)
+        self.name = name
+
+    def __str__(self):
+        return "Column '%s' first appeared after the csv header was written" % self.name
+
+class Column:
+    """The values of a single column in a group of rows.
+
+    Missing values are recorded in 'mask' (which is None if no values are
+    missing).
+    """
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.type = None
+        self.values = None
+        self.mask = None
+        self.size = 0
+
+    def _set_type(self, value):
+        if isinstance(value, (int, long)):
+            self.type = INTEGER
+            self.values = array.array(_TYPECODES[INTEGER])
+        elif isinstance(value, float):
+            self.type = FLOAT
+            self.values = array.array(_TYPECODES[FLOAT])
+        else:
+            self.type = TEXT
+            self.values = []
+
+    def _to_text(self):
+        values = [unicode(v) for v in self.values]
+        if self.mask is not None:
+            values = [v if present else u'' for v, present in zip(values, self.mask)]
+        self.type = TEXT
+        self.values = values
+
+    def append(self, value):
+        if self.values is None:
+            self._set_type(value)
+            # Convert missing values to the column's type
+            missing, self.mask, self.size = self.size, None, 0
+            for i in xrange(missing):
+                self.append_missing()
+        self.size += 1
+        if self.type == TEXT:
+            self.values.append(unicode(value))
+        else:
+            try:
+                self.values.append(value)
+            except (TypeError, OverflowError):
+                # The value doesn't fit the column's type; store it as text.
+                self._to_text()
+                self.values.append(unicode(value))
+        if self.mask is not None:
+            self.mask.append(1)
+
+    def append_missing(self):
+        self.size += 1
+        if self.values is None:
+            # We don't know the type of the column yet.
+            if self.mask is None:
+                self.mask = array.array('B')
+            self.mask.append(0)
+            return
+        if self.mask is None:
+            self.mask = array.array('B', [1] * len(self.values))
+        self.mask.append(0)
+        self.values.append(u'' if self.type == TEXT else 0)
+
+    def get(self, i):
+        """Get the i'th value in the column, or None if it is missing."""
+        if self.mask is not None and not self.mask[i]:
+            return None
+        return self.values[i]
+
+class CsvWriter:
+    """Write groups of rows as comma separated values.
+
+    The header is taken from the first group of rows; missing values are
+    written as empty cells.
+    """
+    def __init__(self, output):
+        self._writer = csv.writer(output)
+        self._names = None
+
+    def write_group(self, rows, columns):
+        if self._names is None:
+            self._names = [c.name for c in columns]
+            self._writer.writerow([n.encode('utf-8') for n in self._names])
+        elif len(columns) != len(self._names):
+            raise NewColumnError(columns[len(self._names)].name)
+        for i in xrange(rows):
+            row = []
+            for column in columns:
+                value = column.get(i)
+                if value is None:
+                    row.append('')
+                elif isinstance(value, unicode):
+                    row.append(value.encode('utf-8'))
+                else:
+                    row.append(value)
+            self._writer.writerow(row)
+
+    def close(self):
+        pass
+
+def _native(values):
+    """Get the little endian bytes of an array."""
+    if values.typecode == _TYPECODES[INTEGER] and values.itemsize != 8:
+        return struct.pack('<%i%s' % (len(values), INTEGER), *values)
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tostring()
+
+class BinaryWriter:
+    """Write groups of rows in a simple binary columnar format.
+
+    The file starts with an eight byte magic number, followed by each group
+    of rows. A group starts with the number of rows and columns (as little
+    endian 32 bit integers), followed by each column;
+
+      * The length of the column name (16 bits) and the utf-8 name.
+      * The column type; 'q' (64 bit integers), 'd' (64 bit floats), or
+        's' (text).
+      * A byte that is 1 if the column has missing values, followed by a
+        byte per row that is 0 for missing values.
+      * For integer and float columns, the little endian values. For text
+        columns, the utf-8 length of each value as little endian 32 bit
+        integers, followed by the utf-8 text.
+
+    Use read_binary to read the groups.
+    """
+    def __init__(self, output):
+        self._output = output
+        self._output.write(_MAGIC)
+
+    def write_group(self, rows, columns):
+        write = self._output.write
+        write(struct.pack('<II', rows, len(columns)))
+        for column in columns:
+            name = column.name.encode('utf-8')
+            write(struct.pack('<H', len(name)) + name)
+            if column.type is None:
+                # This column had no values in this group.
+                write(TEXT + '\x01' + '\x00' * rows)
+                write(_native(array.array('I', [0] * rows)))
+                continue
+            write(column.type)
+            if column.mask is not None:
+                write('\x01' + column.mask.tostring())
+            else:
+                write('\x00')
+            if column.type == TEXT:
+                text = [v.encode('utf-8') for v in column.values]
+                write(_native(array.array('I', [len(t) for t in text])))
+                write(''.join(text))
+            else:
+                write(_native(column.values))
+
+    def close(self):
+        self._output.flush()
+
+def _read(input, length):
+    result = input.read(length)
+    if len(result) != length:
+        raise ValueError('Columnar file is truncated!')
+    return result
+
+def _from_native(typecode, text):
+    result = array.array(typecode)
+    if typecode == _TYPECODES[INTEGER] and result.itemsize != 8:
+        result.extend(struct.unpack('<%i%s' % (len(text) / 8, INTEGER), text))
+        return result
+    result.fromstring(text)
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return result
+
+def read_binary(input):
+    """Read a file written by BinaryWriter.
+
+    Returns an iterator to a (rows, columns) tuple for each group, where
+    columns is a list of Column instances.
+    """
+    if input.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError('Not a bdec columnar file!')
+    while 1:
+        header = input.read(8)
+        if not header:
+            break
+        rows, count = struct.unpack('<II', header + _read(input, 8 - len(header)))
+        columns = []
+        for i in range(count):
+            length, = struct.unpack('<H', _read(input, 2))
+            column = Column(_read(input, length).decode('utf-8'))
+            column.type = _read(input, 1)
+            if _read(input, 1) == '\x01':
+                column.mask = _from_native('B', _read(input, rows))
+            if column.type == TEXT:
+                lengths = _from_native('I', _read(input, 4 * rows))
+                text = _read(input, sum(lengths))
+                column.values = []
+                offset = 0
+                for length in lengths:
+                    column.values.append(text[offset:offset + length].decode('utf-8'))
+                    offset += length
+            else:
+                column.values = _from_native(_TYPECODES[column.type], _read(input, 8 * rows))
+            columns.append(column)
+        yield rows, columns
+
+class ColumnBuilder:
+    """Collect the rows of repeated entries into columns.
+
+    writer -- The writer the groups of rows are written to (eg: CsvWriter
+      or BinaryWriter).
+    name -- The name of the sequenceof whose items are the rows. If None,
+      the first sequenceof that is decoded is used.
+    is_records -- If True, each decode passed to 'add' is a row.
+    group_size -- The number of rows to collect before they are written.
+    """
+    def __init__(self, writer, name=None, is_records=False, group_size=65536):
+        self._writer = writer
+        self._name = name
+        self._entry = None
+        self._is_records = is_records
+        self._group_size = group_size
+        self._columns = []
+        self._lookup = {}
+        self._rows = 0
+
+    def _is_table(self, name, entry):
+        if self._entry is not None:
+            return entry is self._entry
+        if isinstance(entry, sof.SequenceOf) and self._name in (None, name):
+            self._entry = entry
+            return True
+        return False
+
+    def add(self, items):
+        """Add the rows from the decode items of a single decode."""
+        depth = 0
+        row_depth = 1 if self._is_records else None
+        for is_starting, name, entry, data, value in items:
+            if is_starting:
+                depth += 1
+                if row_depth is None:
+                    if self._is_table(name, entry):
+                        row_depth = depth + 1
+                elif depth == row_depth:
+                    row = []
+                    path = []
+                    frames = []
+                    skipped = 0
+                elif depth > row_depth:
+                    if skipped or ent.is_hidden(name) or isinstance(entry, sof.SequenceOf):
+                        skipped += 1
+                        frames.append(None)
+                    elif isinstance(entry, chc.Choice):
+                        frames.append(False)
+                    else:
+                        path.append(name)
+                        frames.append(True)
+            else:
+                if row_depth is None or depth < row_depth - 1:
+                    pass
+                elif depth == row_depth - 1:
+                    # The end of the sequenceof.
+                    row_depth = 1 if self._is_records else None
+                elif depth == row_depth:
+                    if not row and value is not None:
+                        row.append((name, value))
+                    self._add_row(row)
+                else:
+                    frame = frames.pop()
+                    if frame is None:
+                        skipped -= 1
+                    elif frame:
+                        if value is not None:
+                            row.append(('.'.join(path), value))
+                        path.pop()
+                depth -= 1
+
+    def _add_row(self, row):
+        rows = self._rows
+        for name, value in row:
+            try:
+                column = self._lookup[name]
+            except KeyError:
+                # This is the first time we've seen this column.
+                column = self._lookup[name] = Column(name)
+                for i in xrange(rows):
+                    column.append_missing()
+                self._columns.append(column)
+            if column.size == rows:
+                column.append(value)
+        rows += 1
+        for column in self._columns:
+            if column.size != rows:
+                column.append_missing()
+        self._rows = rows
+        if self._rows >= self._group_size:
+            self.flush()
+
+    def flush(self):
+        """Write the rows collected so far."""
+        if self._rows:
+            self._writer.write_group(self._rows, self._columns)
+            for column in self._columns:
+                column.reset()
+            self._rows = 0
+
+    def close(self):
+        self.flush()
+        self._writer.close()
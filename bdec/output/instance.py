@@ -42,10 +42,15 @@
 #   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 #   SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import operator
+import keyword
+import re
+import weakref
 
-from bdec.data import Data
+from bdec import DecodeError
+from bdec.data import Data, DataError
+from bdec.decode import RAISE, SKIP, COLLECT
 from bdec.encode.entry import MissingInstanceError
+import bdec.choice as chc
 import bdec.entry as ent
 import bdec.field as fld
 import bdec.output
@@ -61,8 +66,10 @@ class _Item(object):
         self._value = value
 
     def __getattr__(self, name):
+        # Look up the children through __dict__, as this can be called
+        # before __init__ (eg: when unpickling).
         try:
-            return self._children[name]
+            return self.__dict__['_children'][name]
         except KeyError:
             raise AttributeError(name)
 
@@ -77,13 +84,107 @@ class _Item(object):
             raise TypeError
         return int(self._value)
 
+class _Record(object):
+    """The base class for the classes generated for sequence entries.
+
+    Each visible child of the sequence has a slot, which avoids the memory
+    overhead of a dictionary per instance.
+    """
+    __slots__ = ('_value',)
+    _names = ()
+
+    def _get_children(self):
+        return dict((name, getattr(self, name)) for name in self._names)
+
+    def __repr__(self):
+        result = unicode(self._get_children())
+        if self._value is not None:
+            result = '%i %s' % (self._value, result)
+        return result
+
+    def __int__(self):
+        if self._value is None:
+            raise TypeError
+        return int(self._value)
+
+    def __reduce__(self):
+        # The generated classes cannot be found by the unpickler, so we
+        # pickle records as _Item instances.
+        return (_Item, (self._value, self._get_children()))
+
+_IDENTIFIER = re.compile('^[A-Za-z][A-Za-z0-9_]*$')
+
+# The generated record class for each sequence entry (or None if the
+# sequence cannot be represented by a record class). For choice entries,
+# this is a dictionary of the class for each selected option.
+_classes = weakref.WeakKeyDictionary()
+
+def _create_class(entry, child_names):
+    names = [escape(name) for name in child_names]
+    for name in names:
+        if not _IDENTIFIER.match(name) or keyword.iskeyword(name):
+            return None
+    if len(set(names)) != len(names):
+        return None
+
+    # Create an __init__ that assigns the child values by position.
+    args = ''.join(', _%i' % i for i in range(len(names)))
+    source = 'def __init__(self, _value%s):\n    self._value = _value\n' % args
+    for i, name in enumerate(names):
+        source += '    self.%s = _%i\n' % (name, i)
+    namespace = {}
+    exec source in namespace
+
+    class_name = escape(entry.name)
+    if not _IDENTIFIER.match(class_name):
+        class_name = 'Record'
+    return type(str(class_name), (_Record,), {'__slots__':tuple(names),
+        '_names':tuple(names), '_child_names':tuple(child_names),
+        '__init__':namespace['__init__']})
+
+def _get_class(entry):
+    """Get the record class for a sequence entry.
+
+    Returns None if the names of the visible children cannot be used as
+    attribute names, in which case an _Item should be used.
+    """
+    try:
+        return _classes[entry]
+    except KeyError:
+        names = [c.name for c in entry.children if not ent.is_hidden(c.name)]
+        result = _classes[entry] = _create_class(entry, names)
+        return result
+
+def _get_option_class(entry, name):
+    """Get the record class for a choice entry with a selected option."""
+    try:
+        return _classes[entry][name]
+    except KeyError:
+        options = _classes.setdefault(entry, {})
+        result = options[name] = _create_class(entry, [name])
+        return result
+
 class _DecodedItem:
     """ Class to handle creating python instances from decoded entries """
     def __init__(self, entry):
         self._entry = entry
         self._children = []
+        self._class = None
+        if isinstance(entry, seq.Sequence):
+            self._class = _get_class(entry)
 
     def add_entry(self, name, value):
+        if self._class is not None:
+            # Record classes are constructed from the values by position.
+            names = self._class._child_names
+            if len(self._children) < len(names) and \
+                    names[len(self._children)] == name:
+                self._children.append(value)
+                return
+            # The visible children don't match the entry's children (eg:
+            # when only some entries are selected); use an _Item instead.
+            self._children = zip(names, self._children)
+            self._class = None
         self._children.append((name, value))
 
     def get_value(self, value):
@@ -108,6 +209,19 @@ class _DecodedItem:
                 # This item has no visible children, but has a value; treat it
                 # as the raw value (eg: a sequence with a value).
                 result = value
+            elif self._class is not None and \
+                    len(self._children) == len(self._class._names):
+                result = self._class(value, *self._children)
+            elif self._class is not None:
+                children = zip(self._class._names, self._children)
+                result = _Item(value, dict(children))
+            elif isinstance(self._entry, chc.Choice) and len(self._children) == 1:
+                name, child = self._children[0]
+                klass = _get_option_class(self._entry, name)
+                if klass is not None:
+                    result = klass(value, child)
+                else:
+                    result = _Item(value, {escape(name):child})
             else:
                 children = dict((escape(name), value) for name, value in self._children)
                 result = _Item(value, children)
@@ -133,30 +247,149 @@ def decode(decoder, binary):
     """
     return get_instance(decoder.decode(binary))
 
-def _get_data(obj, child, i, name):
-    if name.endswith(':'):
-        raise MissingInstanceError(obj, child)
+def decode_many(decoder, messages, errors=RAISE):
+    """Create python instances for many independent messages.
 
-    try: 
-        return getattr(obj, escape(name))
-    except (AttributeError, KeyError):
-        pass
+    Returns a list of python instances; see bdec.decode.Decoder.decode_many
+    for the 'errors' handling.
 
-    try:
-        return obj[name]
-    except (AttributeError, KeyError, TypeError):
-        raise MissingInstanceError(obj, child)
-
-def _get_value(obj, child, i, name):
-    result = _get_data(obj, child, i, name)
-    if isinstance(child, sof.SequenceOf):
-        result = [{child.children[0].name: v} for v in result]
+    decoder -- The entry to decode the messages with.
+    """
+    result = []
+    for items in decoder.decode_many(messages, errors):
+        if isinstance(items, list):
+            items = get_instance(items)
+        result.append(items)
     return result
 
+class _SequenceOf:
+    """The items of a sequenceof, wrapped as they are iterated."""
+    def __init__(self, name, items):
+        self._name = name
+        self._items = items
+
+    def __iter__(self):
+        name = self._name
+        for item in self._items:
+            yield {name: item}
+
+class _Query:
+    """Finds the values to encode in python instances.
+
+    The attribute name used for each entry name, and the types whose children
+    have been found by key (eg: dicts) rather than by attribute, are
+    remembered. Children of keyed types are looked up by key first.
+    """
+    def __init__(self):
+        self._attribute_names = {}
+        self._keyed_types = set()
+
+    def _get_data(self, obj, child, i, name):
+        if name.endswith(':'):
+            raise MissingInstanceError(obj, child)
+
+        is_keyed = type(obj) in self._keyed_types
+        if is_keyed:
+            try:
+                return obj[name]
+            except (KeyError, TypeError):
+                pass
+
+        try:
+            attribute = self._attribute_names[name]
+        except KeyError:
+            attribute = self._attribute_names[name] = escape(name)
+        try:
+            return getattr(obj, attribute)
+        except (AttributeError, KeyError):
+            if is_keyed:
+                raise MissingInstanceError(obj, child)
+
+        try:
+            result = obj[name]
+        except (AttributeError, KeyError, TypeError):
+            raise MissingInstanceError(obj, child)
+        self._keyed_types.add(type(obj))
+        return result
+
+    def __call__(self, obj, child, i, name):
+        result = self._get_data(obj, child, i, name)
+        if isinstance(child, sof.SequenceOf):
+            result = _SequenceOf(child.children[0].name, result)
+        return result
+
+def _get_query(protocol):
+    """Get the query for encoding instances with the protocol's encoder.
+
+    The query is kept with the encoder, so what it has cached is freed with
+    the encoder.
+    """
+    queries = protocol.get_encoder().queries
+    try:
+        return queries[_Query]
+    except KeyError:
+        query = queries[_Query] = _Query()
+        return query
+
+def iter_encode(protocol, value):
+    """
+    Encode a python instance to binary data.
+
+    Returns an iterator to bdec.data.Data instances, which may not be whole
+    bytes.
+    """
+    return protocol.encode(_get_query(protocol), {protocol.name: value})
+
 def encode(protocol, value):
     """
     Encode a python instance to binary data.
 
     Returns a bdec.data.Data instance.
     """
-    return reduce(operator.add, protocol.encode(_get_value, {protocol.name: value}), Data())
+    return Data.join(iter_encode(protocol, value))
+
+def encode_many(protocol, values, errors=RAISE, prefix=None):
+    """Encode many independent messages.
+
+    This is a convenience for encoding each message in turn; it isn't any
+    faster than calling encode for each message.
+
+    Returns an iterator to a string of the encoded bytes for each message.
+    Each message must encode to whole bytes. With RAISE or SKIP, the
+    messages can be written to a file with output.writelines(encode_many(...)).
+    With COLLECT, the failures have to be separated from the messages before
+    they are written; eg:
+
+        for message in encode_many(protocol, values, COLLECT):
+            if isinstance(message, DecodeError):
+                failures.append(message)
+            else:
+                output.write(message)
+
+    protocol -- The entry to encode the messages with.
+    values -- An iterable of python instances to encode.
+    errors -- How to handle messages that fail to encode. RAISE re-raises
+        the DecodeError, SKIP ignores the message, and COLLECT returns the
+        DecodeError in place of the message's bytes (as with
+        bdec.decode.Decoder.decode_many).
+    prefix -- If not None, the number of bytes of a big endian length (in
+        bytes) to include before each message.
+    """
+    assert errors in (RAISE, SKIP, COLLECT), "Unknown error handling '%s'!" % errors
+    for value in values:
+        try:
+            data = Data.join(iter_encode(protocol, value))
+            try:
+                message = data.bytes()
+                if prefix is not None:
+                    message = Data.from_int_big_endian(len(message),
+                            prefix * 8).bytes() + message
+            except DataError, ex:
+                raise ent.EntryDataError(protocol, ex)
+        except DecodeError, ex:
+            if errors == RAISE:
+                raise
+            elif errors == SKIP:
+                continue
+            message = ex
+        yield message
@@ -0,0 +1,145 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+"""Write decoded entries as json.
+
+Sequences are written as json objects, sequenceofs as arrays, and fields
+(and sequences with a value but no visible children) as their values. Like
+the xml output, hidden entries are skipped and choices are transparent
+(the selected option appears directly in the parent), unless the output
+is verbose. Unlike the xml output, fields with expected values are written
+with their value.
+
+The json is written as it is decoded, so memory use doesn't grow with the
+size of the input.
+"""
+
+import json.encoder
+import StringIO
+
+import bdec.choice as chc
+import bdec.entry as ent
+import bdec.sequenceof as sof
+
+_escape = json.encoder.encode_basestring_ascii
+
+def _value(value):
+    """Get the json text for a decoded value."""
+    if isinstance(value, (int, long)):
+        if value is True:
+            return 'true'
+        if value is False:
+            return 'false'
+        return str(value)
+    if value is None:
+        return 'null'
+    if isinstance(value, float):
+        return json.dumps(value)
+    if not isinstance(value, basestring):
+        value = unicode(value)
+    return _escape(value)
+
+class _JsonWriter:
+    """Write json text to a file in large chunks.
+
+    As non-ascii characters are escaped, the text is always ascii.
+    """
+    _MAX_PIECES = 8192
+
+    def __init__(self, output):
+        self._output = output
+        self._pieces = []
+        self._keys = {}
+
+    def write(self, text):
+        self._pieces.append(text)
+        if len(self._pieces) > self._MAX_PIECES:
+            self.flush()
+
+    def key(self, name):
+        """Get the text to introduce a member of an object."""
+        try:
+            return self._keys[name]
+        except KeyError:
+            result = self._keys[name] = _escape(name) + ':'
+            return result
+
+    def flush(self):
+        self._output.write(''.join(self._pieces))
+        self._pieces = []
+
+def to_file(items, output, verbose=False):
+    """Write the decoded items as a single line of json.
+
+    items -- An iterable of (is_starting, name, entry, data, value) tuples.
+    output -- The file object to write to.
+    verbose -- If True, hidden entries and choices are included.
+    """
+    writer = _JsonWriter(output)
+    write = writer.write
+    key = writer.key
+    # The objects and arrays being written; each is an [is_list, is_open]
+    # pair. The outermost item is a placeholder for the document itself.
+    stack = [[False, True]]
+    is_visible = []
+    hidden_count = 0
+    try:
+        for is_starting, name, entry, data, value in items:
+            if is_starting:
+                if hidden_count or ent.is_hidden(name):
+                    hidden_count += 1
+                visible = verbose or (not hidden_count and
+                        not isinstance(entry, chc.Choice))
+                is_visible.append(visible)
+                if not visible:
+                    continue
+
+                parent = stack[-1]
+                if len(stack) == 1:
+                    pass
+                elif parent[1]:
+                    write(',' if parent[0] else ',' + key(name))
+                else:
+                    # We only open the parent's object once we know it has
+                    # visible children.
+                    write('[' if parent[0] else '{' + key(name))
+                    parent[1] = True
+                stack.append([isinstance(entry, sof.SequenceOf), False])
+            else:
+                if hidden_count:
+                    hidden_count -= 1
+                if not is_visible.pop():
+                    continue
+
+                is_list, is_open = stack.pop()
+                if is_open:
+                    write(']' if is_list else '}')
+                elif is_list:
+                    write('[]')
+                elif value is not None or not entry.children:
+                    write(_value(value))
+                else:
+                    write('{}')
+        write('\n')
+    finally:
+        writer.flush()
+
+def to_string(items, verbose=False):
+    buffer = StringIO.StringIO()
+    to_file(items, buffer, verbose)
+    return buffer.getvalue()
@@ -0,0 +1,106 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import StringIO
+import unittest
+
+import bdec.choice as chc
+from bdec.constraints import Equals
+import bdec.data as dt
+import bdec.field as fld
+import bdec.output.columnar as columnar
+import bdec.sequence as seq
+import bdec.sequenceof as sof
+
+def _records():
+    record = seq.Sequence('record', [
+        fld.Field('a', 8, format=fld.Field.INTEGER),
+        seq.Sequence('b', [fld.Field('c', 16, format=fld.Field.TEXT)]),
+        fld.Field('d:', 8),
+        sof.SequenceOf('e', fld.Field('f', 8, format=fld.Field.INTEGER), 1)])
+    return seq.Sequence('file', [fld.Field('header', 8, format=fld.Field.INTEGER),
+        sof.SequenceOf('records', record, None)])
+
+def _choices():
+    return sof.SequenceOf('items', chc.Choice('item', [
+        seq.Sequence('x', [fld.Field('id:', 8, constraints=[Equals(1)]),
+            fld.Field('value', 8, format=fld.Field.INTEGER)]),
+        seq.Sequence('y', [fld.Field('id:', 8, constraints=[Equals(2)]),
+            fld.Field('text', 8, format=fld.Field.TEXT)])]), None)
+
+class TestColumnar(unittest.TestCase):
+    def _read(self, entry, data, **kwargs):
+        buffer = StringIO.StringIO()
+        builder = columnar.ColumnBuilder(columnar.BinaryWriter(buffer), **kwargs)
+        builder.add(entry.decode(dt.Data(data)))
+        builder.close()
+        buffer.seek(0)
+        result = []
+        for rows, columns in columnar.read_binary(buffer):
+            result.append(dict((c.name, [c.get(i) for i in range(rows)]) for c in columns))
+        return result
+
+    def test_csv(self):
+        buffer = StringIO.StringIO()
+        builder = columnar.ColumnBuilder(columnar.CsvWriter(buffer))
+        builder.add(_records().decode(dt.Data('\x09\x01ab\x00\x05\x02cd\x00\x06')))
+        builder.close()
+        self.assertEqual('a,b.c\r\n1,ab\r\n2,cd\r\n', buffer.getvalue())
+
+    def test_binary(self):
+        groups = self._read(_records(), '\x09\x01ab\x00\x05\x02cd\x00\x06')
+        self.assertEqual([{'a':[1, 2], 'b.c':[u'ab', u'cd']}], groups)
+
+    def test_column_types(self):
+        buffer = StringIO.StringIO()
+        builder = columnar.ColumnBuilder(columnar.BinaryWriter(buffer))
+        builder.add(_records().decode(dt.Data('\x09\x01ab\x00\x05')))
+        self.assertEqual([columnar.INTEGER, columnar.TEXT],
+                [c.type for c in builder._columns])
+
+    def test_row_groups(self):
+        data = '\x09' + ''.join(chr(i) + 'ab\x00\x00' for i in range(5))
+        groups = self._read(_records(), data, group_size=2)
+        self.assertEqual([[0, 1], [2, 3], [4]], [g['a'] for g in groups])
+
+    def test_missing_values(self):
+        groups = self._read(_choices(), '\x02a\x01\x07\x02b')
+        self.assertEqual([{'y.text':[u'a', None, u'b'], 'x.value':[None, 7, None]}], groups)
+
+    def test_new_column_in_csv(self):
+        builder = columnar.ColumnBuilder(columnar.CsvWriter(StringIO.StringIO()), group_size=1)
+        self.assertRaises(columnar.NewColumnError, builder.add,
+                _choices().decode(dt.Data('\x02a\x01\x07')))
+
+    def test_records(self):
+        record = seq.Sequence('record', [fld.Field('a', 8, format=fld.Field.INTEGER)])
+        buffer = StringIO.StringIO()
+        builder = columnar.ColumnBuilder(columnar.CsvWriter(buffer), is_records=True)
+        for data in ['\x01', '\x02']:
+            builder.add(record.decode(dt.Data(data)))
+        builder.close()
+        self.assertEqual('a\r\n1\r\n2\r\n', buffer.getvalue())
+
+    def test_sequenceof_of_fields(self):
+        entry = sof.SequenceOf('a', fld.Field('b', 8, format=fld.Field.INTEGER), 3)
+        self.assertEqual([{'b':[1, 2, 3]}], self._read(entry, '\x01\x02\x03'))
+
+    def test_large_integers_stored_as_text(self):
+        entry = sof.SequenceOf('a', fld.Field('b', 72, format=fld.Field.INTEGER), 2)
+        groups = self._read(entry, '\x00' * 8 + '\x01' + '\xff' * 9)
+        self.assertEqual([{'b':[u'1', unicode(2 ** 72 - 1)]}], groups)
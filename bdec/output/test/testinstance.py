@@ -43,11 +43,17 @@
 #   SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 #!/usr/bin/env python
+import gc
+import pickle
+import StringIO
 import unittest
+import weakref
 
+from bdec import DecodeError
 import bdec.choice as chc
 from bdec.constraints import Equals
 import bdec.data as dt
+from bdec.decode import COLLECT, SKIP
 from bdec.entry import Child
 from bdec.expression import parse
 import bdec.field as fld
@@ -180,3 +186,114 @@ class TestInstance(unittest.TestCase):
         data = inst.decode(a, dt.Data('\x03cat'))
         self.assertEqual(u"{'b': u'cat'}", unicode(data))
 
+
+    def test_decode_many(self):
+        a = seq.Sequence('a', [fld.Field('b', 8, format=fld.Field.INTEGER)])
+        items = inst.decode_many(a, ['\x01', '\x02', '\x03\x04'], errors='collect')
+        self.assertEqual([1, 2], [item.b for item in items[:2]])
+        self.assertTrue(isinstance(items[2], DecodeError))
+        self.assertEqual([1, 3], [item.b for item in
+            inst.decode_many(a, ['\x01', '', '\x03'], errors='skip')])
+
+    def test_sequence_uses_slots(self):
+        a = seq.Sequence('a', [fld.Field('b c', 8, format=fld.Field.INTEGER),
+            fld.Field('d:', 8)])
+        data = inst.decode(a, dt.Data('\x01\x02'))
+        self.assertEqual(1, data.b_c)
+        self.assertFalse(hasattr(data, '__dict__'))
+        self.assertTrue(type(data) is type(inst.decode(a, dt.Data('\x03\x04'))))
+
+    def test_choice_uses_slots(self):
+        a = chc.Choice('a', [fld.Field('b', 8, constraints=[Equals(1)]),
+            fld.Field('c', 8, format=fld.Field.INTEGER)])
+        data = inst.decode(a, dt.Data('\x07'))
+        self.assertEqual(7, data.c)
+        self.assertFalse(hasattr(data, 'b'))
+        self.assertFalse(hasattr(data, '__dict__'))
+
+    def test_names_that_are_not_identifiers(self):
+        a = seq.Sequence('a', [fld.Field('b-c', 8, format=fld.Field.INTEGER),
+            fld.Field('class', 8, format=fld.Field.INTEGER)])
+        data = inst.decode(a, dt.Data('\x01\x02'))
+        self.assertEqual(1, getattr(data, 'b-c'))
+        self.assertEqual(2, getattr(data, 'class'))
+        self.assertEqual('\x01\x02', inst.encode(a, data).bytes())
+
+    def test_pickle_record(self):
+        a = seq.Sequence('a', [fld.Field('b', 8, format=fld.Field.INTEGER)],
+                value=parse('${b} + 1'))
+        data = pickle.loads(pickle.dumps(inst.decode(a, dt.Data('\x05')), 2))
+        self.assertEqual(5, data.b)
+        self.assertEqual(6, int(data))
+
+    def test_encode_mixed_attributes_and_keys(self):
+        sequence = seq.Sequence("bob", [
+            seq.Sequence("cat", [fld.Field("dog", 8, fld.Field.INTEGER)]),
+            chc.Choice("emu", [fld.Field("fox", 8, fld.Field.INTEGER),
+                fld.Field("gnu", 8, fld.Field.INTEGER)])])
+        blah = _Inst()
+        blah.cat = {'dog': 0x38}
+        blah.gnu = 0x7a
+        self.assertEqual("\x38\x7a", self._encode(sequence, blah))
+        self.assertEqual("\x01\x02", self._encode(sequence, {'cat': {'dog': 1}, 'fox': 2}))
+
+    def test_encode_lookups_are_freed_with_the_encoder(self):
+        class Keyed(dict):
+            pass
+        sequence = seq.Sequence('a', [fld.Field('b', 8, fld.Field.INTEGER)])
+        self.assertEqual('\x07', self._encode(sequence, Keyed(b=7)))
+        keyed = weakref.ref(Keyed)
+        del sequence, Keyed
+        gc.collect()
+        self.assertTrue(keyed() is None)
+
+    def test_encode_sequenceof_from_iterable(self):
+        # The items of a sequenceof don't have to be in a list, as long as
+        # they can be iterated over.
+        a = sof.SequenceOf('a', fld.Field('b', 8, fld.Field.INTEGER), None)
+        self.assertEqual('\x00\x01\x02', self._encode(a, xrange(3)))
+
+    def test_encode_many(self):
+        a = seq.Sequence('a', [fld.Field('b', 8, fld.Field.INTEGER),
+            fld.Field('c', 8, fld.Field.TEXT)])
+        output = StringIO.StringIO()
+        values = [{'b': 1, 'c': 'x'}, {'b': 2, 'c': 'y'}]
+        output.writelines(inst.encode_many(a, values))
+        self.assertEqual('\x01x\x02y', output.getvalue())
+
+    def test_encode_many_with_length_prefix(self):
+        a = seq.Sequence('a', [fld.Field('b:', 8, fld.Field.INTEGER),
+            sof.SequenceOf('c', fld.Field('d', 8, fld.Field.INTEGER), parse('${b:}'))])
+        result = inst.encode_many(a, [{'c': [7]}, {'c': [8, 9]}], prefix=2)
+        self.assertEqual(['\x00\x02\x01\x07', '\x00\x03\x02\x08\x09'], list(result))
+
+    def test_encode_many_failures(self):
+        a = fld.Field('a', 8, fld.Field.INTEGER)
+        values = [1, 256, 'x', 3]
+        self.assertRaises(DecodeError, list, inst.encode_many(a, values))
+        self.assertEqual(['\x01', '\x03'], list(inst.encode_many(a, values, SKIP)))
+
+        result = list(inst.encode_many(a, values, COLLECT))
+        self.assertEqual(4, len(result))
+        self.assertEqual('\x01', result[0])
+        self.assertTrue(isinstance(result[1], DecodeError))
+        self.assertTrue(isinstance(result[2], DecodeError))
+        self.assertEqual('\x03', result[3])
+
+    def test_encode_many_collect_failures_while_writing(self):
+        a = fld.Field('a', 8, fld.Field.INTEGER)
+        output = StringIO.StringIO()
+        failures = []
+        for i, message in enumerate(inst.encode_many(a, [1, 256, 2, 'x', 3], COLLECT)):
+            if isinstance(message, DecodeError):
+                failures.append(i)
+            else:
+                output.write(message)
+        self.assertEqual([1, 3], failures)
+        self.assertEqual('\x01\x02\x03', output.getvalue())
+
+    def test_encode_many_needs_whole_bytes(self):
+        a = fld.Field('a', 4, fld.Field.INTEGER)
+        result = list(inst.encode_many(a, [1], COLLECT))
+        self.assertEqual(1, len(result))
+        self.assertTrue(isinstance(result[0], DecodeError))
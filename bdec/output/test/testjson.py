@@ -0,0 +1,83 @@
+#   Copyright (C) 2026 Henry Ludemann
+#
+#   This file is part of the bdec decoder library.
+#
+#   The bdec decoder library is free software; you can redistribute it
+#   and/or modify it under the terms of the GNU Lesser General Public
+#   License as published by the Free Software Foundation; either
+#   version 2.1 of the License, or (at your option) any later version.
+#
+#   The bdec decoder library is distributed in the hope that it will be
+#   useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+#   of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with this library; if not, see
+#   <http://www.gnu.org/licenses/>.
+
+import json
+import unittest
+
+import bdec.choice as chc
+from bdec.constraints import Equals
+import bdec.data as dt
+from bdec.expression import parse
+import bdec.field as fld
+import bdec.output.jsonout as jsonout
+import bdec.sequence as seq
+import bdec.sequenceof as sof
+
+class TestJson(unittest.TestCase):
+    def _decode(self, entry, data, verbose=False):
+        text = jsonout.to_string(entry.decode(dt.Data(data)), verbose)
+        self.assertTrue(text.endswith('\n'))
+        self.assertEqual(1, text.count('\n'))
+        return json.loads(text)
+
+    def test_field(self):
+        field = fld.Field('bob', 8, format=fld.Field.INTEGER)
+        self.assertEqual(7, self._decode(field, '\x07'))
+
+    def test_sequence(self):
+        a = seq.Sequence('a', [fld.Field('b c', 8, format=fld.Field.INTEGER),
+            fld.Field('d', 16, format=fld.Field.TEXT),
+            fld.Field('e', 8, format=fld.Field.HEX)])
+        self.assertEqual({'b c':1, 'd':'xy', 'e':'ff'}, self._decode(a, '\x01xy\xff'))
+
+    def test_sequenceof(self):
+        a = sof.SequenceOf('a', fld.Field('b', 8, format=fld.Field.INTEGER), 3)
+        self.assertEqual([1, 2, 3], self._decode(a, '\x01\x02\x03'))
+
+    def test_empty_sequenceof(self):
+        a = seq.Sequence('a', [
+            sof.SequenceOf('b', fld.Field('c', 8, format=fld.Field.INTEGER), 0)])
+        self.assertEqual({'b':[]}, self._decode(a, ''))
+
+    def test_hidden_entries(self):
+        a = seq.Sequence('a', [fld.Field('b:', 8, format=fld.Field.INTEGER),
+            seq.Sequence('', [fld.Field('c', 8, format=fld.Field.INTEGER)]),
+            fld.Field('d', 8, format=fld.Field.INTEGER)])
+        self.assertEqual({'d':3}, self._decode(a, '\x01\x02\x03'))
+
+    def test_verbose_includes_hidden_entries(self):
+        a = seq.Sequence('a', [fld.Field('b:', 8, format=fld.Field.INTEGER),
+            fld.Field('d', 8, format=fld.Field.INTEGER)])
+        self.assertEqual({'b:':1, 'd':3}, self._decode(a, '\x01\x03', True))
+
+    def test_choice_is_transparent(self):
+        a = sof.SequenceOf('a', chc.Choice('b', [
+            fld.Field('c', 8, format=fld.Field.INTEGER, constraints=[Equals(1)]),
+            fld.Field('d', 8, format=fld.Field.INTEGER)]), 2)
+        self.assertEqual([1, 5], self._decode(a, '\x01\x05'))
+        self.assertEqual([{'c':1}, {'d':5}], self._decode(a, '\x01\x05', True))
+
+    def test_sequence_with_value(self):
+        a = seq.Sequence('a', [seq.Sequence('b', [fld.Field('c:', 8)],
+            value=parse('${c:} * 2'))])
+        self.assertEqual({'b':14}, self._decode(a, '\x07'))
+
+    def test_escaped_text(self):
+        a = fld.Field('a', 56, format=fld.Field.TEXT, encoding='utf-8')
+        text = jsonout.to_string(a.decode(dt.Data('"\\\xc3\xa9\n\x01\t')))
+        self.assertEqual('"\\"\\\\\\u00e9\\n\\u0001\\t"\n', text)
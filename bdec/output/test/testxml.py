@@ -43,8 +43,11 @@
 #   SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 #!/usr/bin/env python
+import operator
+import StringIO
 import unittest
 
+from bdec import DecodeError
 import bdec.choice as chc
 from bdec.constraints import Equals
 import bdec.data as dt
@@ -177,3 +180,73 @@ class TestXml(unittest.TestCase):
                 ]), count=3)
         self.assertEqual('\x03\x05\x07', xml.encode(a, '<a><b1/><b2/><b3/></a>').bytes())
 
+
+    def test_escaped_text(self):
+        a = fld.Field('a', length=56, format=fld.Field.TEXT, encoding='utf-8')
+        text = xml.to_string(a.decode(dt.Data('<&\x01\xc3\xa9>\t')))
+        self.assertEqual('<a>&lt;&amp;?\xc3\xa9&gt;\t</a>\n', text)
+
+    def test_unencodable_text(self):
+        a = fld.Field('a', length=16, format=fld.Field.TEXT, encoding='utf-8')
+        buffer = StringIO.StringIO()
+        xml.to_file(a.decode(dt.Data('\xc3\xa9')), buffer, encoding='ascii')
+        self.assertEqual('<a>&#233;</a>\n', buffer.getvalue())
+
+    def test_partial_output_is_written(self):
+        a = seq.Sequence('a', [fld.Field('b', length=8, format=fld.Field.INTEGER),
+            fld.Field('c', length=8, format=fld.Field.INTEGER)])
+        buffer = StringIO.StringIO()
+        self.assertRaises(DecodeError, xml.to_file, a.decode(dt.Data('\x05')), buffer)
+        self.assertEqual('<a>\n    <b>5</b>\n    <c>', buffer.getvalue())
+
+    def test_encode_from_file(self):
+        spec = sof.SequenceOf('cat', fld.Field('dog', 8, fld.Field.TEXT), 4)
+        source = StringIO.StringIO("<cat><dog>a</dog><dog>b</dog><dog>c</dog><dog>d</dog></cat>")
+        self.assertEqual("abcd", xml.encode(spec, source).bytes())
+
+    def test_sequenceof_is_encoded_as_it_is_read(self):
+        spec = sof.SequenceOf('a', fld.Field('b', 8, fld.Field.INTEGER), 10000)
+        source = StringIO.StringIO('<a>' + '<b>7</b>' * 10000 + '</a>')
+        data = xml.iter_encode(spec, source)
+        self.assertEqual('\x07', data.next().bytes())
+        self.assertTrue(source.tell() < len(source.getvalue()))
+        self.assertEqual('\x07' * 9999, reduce(operator.add, data).bytes())
+
+    def test_encoded_items_are_released(self):
+        item = seq.Sequence('b', [fld.Field('c', 8, fld.Field.INTEGER),
+            fld.Field('d', 8, fld.Field.INTEGER)])
+        spec = sof.SequenceOf('a', item, 1000)
+        source = StringIO.StringIO('<a>' + '<b><c>1</c><d>2</d></b>' * 1000 + '</a>')
+        reader = xml._Reader(spec, source)
+        document = xml._SequenceOfEntry(reader, reader.get_root())
+        retained = 0
+        for data in spec.encode(xml._query_element, document):
+            retained = max(retained, len(reader._complete))
+        self.assertTrue(retained < 100)
+
+    def test_absent_entry_stops_at_the_next_entry(self):
+        # Looking for the hidden field shouldn't read the whole sequenceof.
+        spec = seq.Sequence('a', [
+            fld.Field('b:', 8, fld.Field.INTEGER, constraints=[Equals(5)]),
+            sof.SequenceOf('c', fld.Field('d', 8, fld.Field.INTEGER), 10000)])
+        source = StringIO.StringIO('<a><c>' + '<d>7</d>' * 10000 + '</c></a>')
+        data = xml.iter_encode(spec, source)
+        self.assertEqual('\x05', data.next().bytes())
+        self.assertTrue(source.tell() < len(source.getvalue()))
+        self.assertEqual('\x07' * 10000, dt.Data.join(data).bytes())
+
+    def test_elements_out_of_order(self):
+        a = seq.Sequence('a', [fld.Field('b', 8, fld.Field.INTEGER),
+            fld.Field('c', 8, fld.Field.INTEGER), fld.Field('d', 8, fld.Field.INTEGER)])
+        self.assertEqual('\x01\x02\x03', xml.encode(a, '<a><d>3</d><c>2</c><b>1</b></a>').bytes())
+
+    def test_option_after_a_chunk_boundary(self):
+        # The large siblings force the option's element to be parsed in a
+        # later chunk than the choice is encoded in.
+        a = seq.Sequence('a', [fld.Field('b', 8, fld.Field.INTEGER),
+            chc.Choice('c', [
+                fld.Field('x', 8, fld.Field.INTEGER, constraints=[Equals(1)]),
+                fld.Field('y', 8, fld.Field.INTEGER)])])
+        padding = ''.join('<j%i>%s</j%i>' % (i, 'p' * 40000, i) for i in range(6))
+        text = '<a><b>1</b>' + padding + '<y>2</y></a>'
+        self.assertEqual('\x01\x02', xml.encode(a, text).bytes())
@@ -42,13 +42,10 @@
 #   (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 #   SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import logging
-import operator
+import codecs
 import string
 import StringIO
-import xml.dom.minidom
-import xml.sax.saxutils
-import xml.sax.xmlreader
+import xml.etree.cElementTree as ElementTree
 
 from bdec.constraints import Equals
 from bdec.encode.entry import MissingInstanceError
@@ -67,14 +64,6 @@ def escape_name(name):
     result = ''.join((c if c not in '():/' else '_') for c in name )
     return result.replace(' ', '-')
 
-class _XMLGenerator(xml.sax.saxutils.XMLGenerator):
-    def __init__(self, *args, **kwargs):
-        xml.sax.saxutils.XMLGenerator.__init__(self, *args, **kwargs)
-        self.__out = args[0]
-
-    def comment(self, text):
-        self.__out.write('<!-- %s -->' % text)
-
 class UnknownIntegerError(Exception):
     def __str__(self):
         return 'Sequence has unknown integer value'
@@ -82,22 +71,19 @@ class UnknownIntegerError(Exception):
 def _unknown_integer_error():
     raise UnknownIntegerError()
 
-def _escape_char(character):
-    # The list of 'safe' xml characters is from http://www.w3.org/TR/REC-xml/#NT-Char
-    ordinal = ord(character)
-    if ordinal >= 0x20:
-        return character
-    if ordinal in [0x9, 0xa, 0xd]:
-        return character
-    return '?'
+# The list of 'safe' xml characters is from http://www.w3.org/TR/REC-xml/#NT-Char;
+# other control characters are replaced with '?'.
+_UNSAFE_CHARS = [i for i in range(0x20) if i not in [0x9, 0xa, 0xd]]
+_STRIP_TABLE = dict((i, u'?') for i in _UNSAFE_CHARS)
+_STRIP_BYTES = ''.join('?' if i in _UNSAFE_CHARS else chr(i) for i in range(256))
+_ESCAPE_TABLE = dict(_STRIP_TABLE)
+_ESCAPE_TABLE.update({ord('&'):u'&amp;', ord('<'):u'&lt;', ord('>'):u'&gt;'})
 
 def xml_strip(text):
     """Replace chracters that cannot be represented in xml."""
-    return ''.join(_escape_char(char) for char in text)
-
-def _print_whitespace(handler, offset):
-    handler.ignorableWhitespace('\n')
-    handler.ignorableWhitespace(' ' * offset)
+    if isinstance(text, unicode):
+        return text.translate(_STRIP_TABLE)
+    return text.translate(_STRIP_BYTES)
 
 def _has_expected_value(entry):
     for constraint in entry.constraints:
@@ -105,91 +91,352 @@ def _has_expected_value(entry):
             return True
     return False
 
+class _XmlWriter:
+    """Write xml text to a file in large, encoded chunks.
+
+    Text is collected in a list and only encoded and written when enough of
+    it has accumulated (or when the writer is flushed).
+    """
+    _MAX_PIECES = 8192
+
+    def __init__(self, output, encoding):
+        self._output = output
+        self._encoder = codecs.getincrementalencoder(encoding)('xmlcharrefreplace')
+        self._pieces = []
+        self._names = {}
+        self._indents = {}
+
+    def write(self, text):
+        self._pieces.append(text)
+        if len(self._pieces) > self._MAX_PIECES:
+            self.flush()
+
+    def tags(self, name):
+        """Get the (start, end) tags for an element name."""
+        try:
+            return self._names[name]
+        except KeyError:
+            tag = unicode(escape_name(name))
+            result = self._names[name] = (u'<%s>' % tag, u'</%s>' % tag)
+            return result
+
+    def indent(self, offset):
+        """Get the whitespace to start a new line at the given offset."""
+        try:
+            return self._indents[offset]
+        except KeyError:
+            result = self._indents[offset] = u'\n' + u' ' * offset
+            return result
+
+    def flush(self):
+        self._output.write(self._encoder.encode(u''.join(self._pieces)))
+        self._pieces = []
+
 def to_file(items, output, encoding="utf-8", verbose=False):
-    handler = _XMLGenerator(output, encoding)
+    writer = _XmlWriter(output, encoding)
+    write = writer.write
+    tags = writer.tags
+    indent = writer.indent
+    has_values = {}
     offset = 0
     is_first = True
     hidden_count = 0
     has_children = False
-    for is_starting, name, entry, data, value in items:
-        # If we have an entry that is hidden, all entries under that should
-        # also be hidden.
-        if is_starting:
-            if hidden_count or ent.is_hidden(name):
-                hidden_count += 1
-        is_hidden = hidden_count != 0
-        if not is_starting and hidden_count:
-            hidden_count -= 1
-
-        if not verbose and (is_hidden or isinstance(entry, chc.Choice)):
-            # By default, we don't output hidden or choice entries.
-            continue
-
-        if is_starting:
-            if not is_first:
-                _print_whitespace(handler, offset)
-            is_first = False
-
-            handler.startElement(escape_name(name), xml.sax.xmlreader.AttributesImpl({}))
-            offset = offset + 4
-            has_children = False
-        else:
-            # An element is ending; we only include the surrounding whitespace
-            # if the entry has visible children (otherwise we try an keep the
-            # value compact with the entries). This means strings with leading
-            # and trailing whitespace can be represented (and produces nicer
-            # xml).
-            if value is not None and not _has_expected_value(entry):
+    try:
+        for is_starting, name, entry, data, value in items:
+            # If we have an entry that is hidden, all entries under that should
+            # also be hidden.
+            if is_starting:
+                if hidden_count or ent.is_hidden(name):
+                    hidden_count += 1
+            is_hidden = hidden_count != 0
+            if not is_starting and hidden_count:
+                hidden_count -= 1
+
+            if not verbose and (is_hidden or isinstance(entry, chc.Choice)):
+                # By default, we don't output hidden or choice entries.
+                continue
+
+            if is_starting:
+                if not is_first:
+                    write(indent(offset))
+                is_first = False
+
+                write(tags(name)[0])
+                offset = offset + 4
+                has_children = False
+            else:
+                # An element is ending; we only include the surrounding whitespace
+                # if the entry has visible children (otherwise we try an keep the
+                # value compact with the entries). This means strings with leading
+                # and trailing whitespace can be represented (and produces nicer
+                # xml).
+                if value is not None:
+                    try:
+                        has_value = has_values[entry]
+                    except KeyError:
+                        has_value = has_values[entry] = not _has_expected_value(entry)
+                    if has_value:
+                        if has_children:
+                            write(indent(offset))
+                        write(unicode(value).translate(_ESCAPE_TABLE))
+
+                if verbose and data:
+                    write(u'<!-- %s -->' % data)
+                offset = offset - 4
                 if has_children:
-                    _print_whitespace(handler, offset)
-
-                text = xml_strip(unicode(value))
-                handler.characters(text)
-
-            if verbose and data:
-                handler.comment(str(data))
-            offset = offset - 4
-            if has_children:
-                _print_whitespace(handler, offset)
-            handler.endElement(escape_name(name))
+                    write(indent(offset))
+                write(tags(name)[1])
 
-            has_children = True
-    handler.ignorableWhitespace('\n')
+                has_children = True
+        write(u'\n')
+    finally:
+        # Write any pending text, even if the decode failed part way.
+        writer.flush()
 
 def to_string(items, verbose=False):
     buffer  = StringIO.StringIO()
     to_file(items, buffer, verbose=verbose)
     return buffer.getvalue()
 
-class _SequenceOfEntry:
-    """A class to iterate over xml children entries from a sequenceof. """
-    def __init__(self, node):
-        self.childNodes = [node]
+class _Reader:
+    """Read the elements of an xml document as they are needed.
+
+    The document is parsed incrementally, so only the parts of the document
+    that have been read (and not yet released) are kept in memory.
+    """
+    def __init__(self, protocol, source):
+        self._events = ElementTree.iterparse(source, ('start', 'end'))
+        self._complete = set()
+        self._released = set()
+        self.root = None
+
+        # The (tag, stops) used to find the element of each (entry, name).
+        self.lookups = {}
+
+        # The tags of the entries that follow each (entry, name) that is
+        # often absent from the document (hidden entries, choices and their
+        # options). When looking for such an entry we stop at these tags,
+        # rather than reading the rest of the parent element. Entries that
+        # can appear in any order (all others) aren't included.
+        self._stops = {}
+        self._find_stops(protocol, set())
+
+        # Entries inside choices may be encoded multiple times (as the
+        # options are trial encoded), so we can only release the items of
+        # sequenceofs that aren't inside a choice.
+        self.streamable = set()
+        inside_choice = set()
+        self._walk(protocol, False, inside_choice, set())
+        self.streamable -= inside_choice
+
+    def _walk(self, entry, is_in_choice, inside_choice, visited):
+        if (entry, is_in_choice) in visited:
+            return
+        visited.add((entry, is_in_choice))
+        if is_in_choice:
+            inside_choice.add(entry)
+        elif isinstance(entry, sof.SequenceOf):
+            self.streamable.add(entry)
+        for child in entry.children:
+            self._walk(child.entry, is_in_choice or isinstance(entry, chc.Choice),
+                    inside_choice, visited)
+
+    def _tags(self, child):
+        """Get the tags a child entry can appear as in the document."""
+        result = set()
+        if not ent.is_hidden(child.name):
+            result.add(escape_name(child.name))
+            if isinstance(child.entry, chc.Choice):
+                # Choices aren't usually in the document, so the option will
+                # be present instead.
+                for option in child.entry.children:
+                    result.update(self._tags(option))
+        return result
+
+    def _find_stops(self, entry, visited, following=frozenset()):
+        """Find the tags that follow the entries that are often absent.
+
+        following -- The tags that can follow the entry (when the entry is a
+            choice, as its options aren't usually in their own element).
+        """
+        if (entry, following) in visited:
+            return
+        visited.add((entry, following))
+        if isinstance(entry, chc.Choice):
+            for child in entry.children:
+                self._add_stops(child, following)
+                self._find_stops(child.entry, visited, following)
+            return
+
+        for i, child in enumerate(entry.children):
+            if ent.is_hidden(child.name) or isinstance(child.entry, chc.Choice):
+                tags = set()
+                for later in entry.children[i + 1:]:
+                    tags.update(self._tags(later))
+                tags = frozenset(tags)
+                self._add_stops(child, tags)
+                self._find_stops(child.entry, visited, tags)
+            else:
+                # This entry can be anywhere in the parent element.
+                self._stops[child.entry, child.name] = None
+                self._find_stops(child.entry, visited)
+
+    def _add_stops(self, child, tags):
+        key = (child.entry, child.name)
+        try:
+            current = self._stops[key]
+        except KeyError:
+            self._stops[key] = tags
+            return
+        if current is not None:
+            # The entry is used in several places; we can only stop at the
+            # tags that follow it in all of them.
+            self._stops[key] = current & tags
+
+    def get_stops(self, entry, name):
+        """Get the tags to stop looking for an entry at (or None)."""
+        return self._stops.get((entry, name)) or None
+
+    def _next(self):
+        """Handle the next parse event; returns False at the end of the document."""
+        try:
+            event, element = self._events.next()
+        except StopIteration:
+            return False
+        if event == 'start':
+            if self.root is None:
+                self.root = element
+        elif element in self._released:
+            self._released.remove(element)
+            self._discard(element)
+        else:
+            self._complete.add(element)
+        return True
+
+    def get_root(self):
+        while self.root is None and self._next():
+            pass
+        return self.root
+
+    def get_child(self, element, index):
+        """Get a child of an element, or None if it doesn't have that many."""
+        while len(element) <= index and element not in self._complete:
+            if not self._next():
+                break
+        if len(element) > index:
+            return element[index]
+        return None
+
+    def get_text(self, element):
+        """Get the text of an element (not including its children)."""
+        while element not in self._complete and self._next():
+            pass
+        return (element.text or '') + ''.join(c.tail or '' for c in element)
+
+    def _discard(self, element):
+        """Forget a complete element (and its children)."""
+        self._complete.difference_update(element.iter())
+        element.clear()
+
+    def release(self, parent, element):
+        """Release an element that is no longer needed."""
+        parent.remove(element)
+        if element in self._complete:
+            self._discard(element)
+        else:
+            self._released.add(element)
+
+
+class _Element:
+    """An xml element whose children are read as they are needed."""
+    def __init__(self, reader, element, is_valued):
+        self.reader = reader
+        self.element = element
+        self._is_valued = is_valued
+
+        # The index of the first child with each tag, for the first
+        # '_indexed' children.
+        self._tags = {}
+        self._indexed = 0
+
+    def find_element(self, name, stops=None):
+        """Find the first child element with the given tag name.
+
+        The rest of the element is read until the tag is found, or until a
+        child with one of the 'stops' tags is found (if not None).
+        """
+        try:
+            return self.element[self._tags[name]]
+        except KeyError:
+            pass
+        if stops is not None and not stops.isdisjoint(self._tags):
+            return None
+
+        # Index the children we haven't seen yet until we find the tag.
+        i = self._indexed
+        while True:
+            child = self.reader.get_child(self.element, i)
+            if child is None:
+                break
+            self._tags.setdefault(child.tag, i)
+            i += 1
+            self._indexed = i
+            if child.tag == name:
+                return child
+            if stops is not None and child.tag in stops:
+                break
+        return None
+
+    def __int__(self):
+        if not self._is_valued:
+            raise TypeError('%s has no value' % self)
+        text = self.reader.get_text(self.element)
+        if not text.strip():
+            _unknown_integer_error()
+        return int(text)
 
     def __repr__(self):
-        return 'Sequenceof node %s' % self.childNodes[0]
+        return 'element %s' % self.element.tag
 
 
-def _query_element(obj, child, offset, name):
-    """
-    Get a named child-element of a node.
+class _SequenceOfEntry:
+    """An item from a sequenceof, as the parent of the item's element."""
+    def __init__(self, reader, element):
+        self.reader = reader
+        self._element = element
 
-    If the child has no sub-elements itself, return the element text contents.
-    """
-    try:
-        childNodes = obj.childNodes
-    except AttributeError:
-        raise MissingInstanceError(obj, child)
+    def find_element(self, name, stops=None):
+        if self._element.tag == name:
+            return self._element
+        return None
+
+    def __repr__(self):
+        return 'Sequenceof node %s' % self._element.tag
 
-    name = escape_name(name)
-    for child_node in childNodes:
-        if child_node.nodeType == xml.dom.Node.ELEMENT_NODE and child_node.tagName == name:
-            return _get_element_value(child_node, child)
 
-    raise MissingInstanceError(obj, child)
+class _SequenceOf:
+    """The items of a sequenceof element, read as they are iterated."""
+    def __init__(self, reader, element, is_streamable):
+        self._reader = reader
+        self._element = element
+        self._is_streamable = is_streamable
 
-def _get_element_value(element, entry):
-    """Get an instance that can be encoded for a given xml element node.
+    def __iter__(self):
+        i = 0
+        child = self._reader.get_child(self._element, i)
+        while child is not None:
+            yield _SequenceOfEntry(self._reader, child)
+            if self._is_streamable:
+                # The item has been encoded, so it can be released.
+                self._reader.release(self._element, child)
+            else:
+                i += 1
+            child = self._reader.get_child(self._element, i)
+
+
+def _get_element_value(reader, element, entry):
+    """Get an instance that can be encoded for a given xml element.
 
     element -- The xml element to be encoded.
     entry -- The entry this element represents.
@@ -197,38 +444,60 @@ def _get_element_value(element, entry):
     if isinstance(entry, sof.SequenceOf):
         # This element represents a sequence of, so we'll return an
         # object to iterate over the children.
-        return list(_SequenceOfEntry(n) for n in element.childNodes if n.nodeType == xml.dom.Node.ELEMENT_NODE)
+        return _SequenceOf(reader, element, entry in reader.streamable)
 
-    text = ""
-    has_children = False
-    for child in element.childNodes:
-        if child.nodeType == xml.dom.Node.ELEMENT_NODE:
-            has_children = True
-        elif child.nodeType == xml.dom.Node.TEXT_NODE:
-            text += child.data
-
-    if isinstance(entry, Sequence) and entry.value:
-        if text.strip():
-            element.__int__ = lambda: int(text)
-        else:
-            element.__int__ = _unknown_integer_error
-
-    if has_children:
+    if reader.get_child(element, 0) is not None:
         # This element has sub-elements, so return the high-level element
         # itself.
-        return element
+        return _Element(reader, element, isinstance(entry, Sequence) and entry.value)
 
     # No sub-elements; this element is a 'value' type.
-    return text
+    return reader.get_text(element)
 
-def encode(protocol, xmldata):
+def _query_element(obj, child, offset, name):
+    """
+    Get a named child-element of a node.
+
+    If the child has no sub-elements itself, return the element text contents.
+    """
+    try:
+        find = obj.find_element
+    except AttributeError:
+        raise MissingInstanceError(obj, child)
+
+    reader = obj.reader
+    try:
+        tag, stops = reader.lookups[child, name]
+    except KeyError:
+        tag = escape_name(name)
+        stops = reader.get_stops(child, name)
+        reader.lookups[child, name] = (tag, stops)
+    element = find(tag, stops)
+    if element is None:
+        raise MissingInstanceError(obj, child)
+    return _get_element_value(reader, element, child)
+
+def iter_encode(protocol, xmldata):
     """
     Encode an xml string or file object to binary data.
 
-    Returns an iterator to data objects representing the encoded structure.
+    The xml is read as it is encoded, and the items of sequenceofs are
+    released once they have been encoded, so large documents can be encoded
+    without being read into memory.
+
+    Returns an iterator to bdec.data.Data instances, which may not be whole
+    bytes.
     """
     if isinstance(xmldata, basestring):
         xmldata = StringIO.StringIO(xmldata)
-    document = xml.dom.minidom.parse(xmldata)
-    return reduce(operator.add, protocol.encode(_query_element, document), Data())
+    reader = _Reader(protocol, xmldata)
+    document = _SequenceOfEntry(reader, reader.get_root())
+    return protocol.encode(_query_element, document)
+
+def encode(protocol, xmldata):
+    """
+    Encode an xml string or file object to binary data.
 
+    Returns a bdec.data.Data instance.
+    """
+    return Data.join(iter_encode(protocol, xmldata))
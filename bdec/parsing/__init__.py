@@ -34,7 +34,9 @@ alphanums = alphas + nums
 
 class ParseException(DecodeError):
     def __init__(self, filename, text, offset, ex):
-        DecodeError.__init__(self, ex.entry)
+        # Errors from the character matcher don't have an associated entry,
+        # so we don't use the DecodeError constructor.
+        self.entry = getattr(ex, 'entry', None)
         self._filename = filename
         self._text = text
         self._offset = offset
@@ -97,8 +99,97 @@ class ParseResults:
         return list(self._tokens)
 
 
+class _NoMatch(Exception):
+    """Raised internally when an element fails to match the text."""
+    def __init__(self, element, loc):
+        self.element = element
+        self.loc = loc
+
+    def __str__(self):
+        return 'Expected %s' % self.element
+
+
+class _ParseState:
+    """The text being parsed, and the packrat cache for a single parse."""
+    def __init__(self, text, should_cache):
+        self.text = text
+        self.cache = {} if should_cache else None
+        self.error = None
+
+    def fail(self, element, loc):
+        """Raise a _NoMatch error, remembering the furthest failure.
+
+        The furthest failure is the most useful when reporting errors, as
+        it is where the best matching option gave up."""
+        error = _NoMatch(element, loc)
+        if self.error is None or loc >= self.error.loc:
+            self.error = error
+        raise error
+
+
+_WHITESPACE = ' \n'
+
+def _create_skip(separator):
+    """Create a function that will skip over whitespace and ignored entries.
+
+    separator -- A tuple of elements to be ignored between tokens, or None
+        if tokens shouldn't be separated (ie: within a Combine).
+    return -- A function taking (state, loc) and returning the new location.
+    """
+    if separator is None:
+        return lambda state, loc: loc
+
+    ignores = [e.createMatcher(None) for e in separator]
+    def skip(state, loc):
+        text = state.text
+        end = len(text)
+        while 1:
+            start = loc
+            while loc < end and text[loc] in _WHITESPACE:
+                loc += 1
+            for ignore in ignores:
+                try:
+                    loc = ignore(state, loc)[0]
+                except _NoMatch:
+                    pass
+            if loc == start:
+                return loc
+    return skip
+
+def _memoize(match):
+    """Wrap a matcher in a packrat cache of (matcher, location) results."""
+    def memoized(state, loc):
+        if state.cache is None:
+            return match(state, loc)
+
+        key = (memoized, loc)
+        try:
+            result = state.cache[key]
+        except KeyError:
+            try:
+                result = match(state, loc)
+            except _NoMatch, ex:
+                result = ex
+            state.cache[key] = result
+
+        if isinstance(result, _NoMatch):
+            raise result
+        # Return copies, as the caller is free to modify the results.
+        loc, tokens, names = result
+        return loc, list(tokens), dict(names)
+    return memoized
+
+
 class ParserElement:
-    """Base class for all parser elements."""
+    """Base class for all parser elements.
+
+    Elements can be parsed in two ways; by compiling them to bdec entries
+    (see createDecoder), or by matching directly against the text (see
+    createMatcher). parseString uses the character matcher.
+    """
+    _should_memoize = False
+    _packrat_enabled = False
+
     def __init__(self):
         self._actions = []
         self._internal_actions = []
@@ -107,9 +198,18 @@ class ParserElement:
         # The parser includes leading whitespace, the decoder doesn't.
         self._parser = None
         self._decoder = None
+        self._matchers = {}
         self._ignore = None
         self._name = None
 
+    @staticmethod
+    def enablePackrat():
+        """Cache the results of alternatives at each location in the text.
+
+        Parse actions must not have side effects when packrat parsing is
+        enabled, as their results may be reused."""
+        ParserElement._packrat_enabled = True
+
     def copy(self):
         return And([self])
 
@@ -152,6 +252,64 @@ class ParserElement:
         self._decoder.actions += self._internal_actions + self._actions
         return self._decoder
 
+    def _createMatcher(self, separator):
+        """Create a function to match this element against the text.
+
+        The returned function takes (state, loc), and returns a tuple of
+        (loc, tokens, names), or calls state.fail if the element doesn't
+        match. Internal actions should be applied by the returned function.
+        """
+        raise NotImplementedError()
+
+    def createMatcher(self, separator=()):
+        """Create a function to match this element directly against the text.
+
+        separator -- A tuple of elements (in addition to whitespace) that can
+            be skipped after each token, or None if tokens cannot be
+            separated.
+        """
+        if self._ignore is not None and separator is not None:
+            separator = separator + (self._ignore,)
+        try:
+            return self._matchers[separator]
+        except KeyError:
+            pass
+
+        # Recursive elements may ask for our matcher while we are creating
+        # it; give them a function that will call the matcher once it has
+        # been created.
+        created = []
+        self._matchers[separator] = lambda state, loc: created[0](state, loc)
+        match = self._createMatcher(separator)
+        if self._actions or (self._name is not None and not is_hidden(self._name)):
+            match = self._apply_actions(match)
+        if self._should_memoize:
+            match = _memoize(match)
+        created.append(match)
+        self._matchers[separator] = match
+        return match
+
+    def _apply_actions(self, match):
+        actions = list(self._actions)
+        name = self._name
+        if name is not None and is_hidden(name):
+            name = None
+        def matcher(state, loc):
+            loc, tokens, names = match(state, loc)
+            results = ParseResults(tokens, names)
+            for action in actions:
+                results = action(results)
+                if not isinstance(results, ParseResults):
+                    if not isinstance(results, list):
+                        results = [results]
+                    names = {}
+                    results = ParseResults(results, names)
+            if name is not None:
+                names = dict(names)
+                names.setdefault(name, results)
+            return loc, list(results), names
+        return matcher
+
     def setParseAction(self, fn):
         self._actions = []
         return self.addParseAction(fn)
@@ -172,6 +330,26 @@ class ParserElement:
         if isinstance(text, unicode):
             text = text.encode('ascii')
 
+        # Leading whitespace has to be skipped, as whitespace is matched at
+        # the end of the Literal (and Word) elements.
+        separator = () if self._ignore is None else (self._ignore,)
+        skip = _create_skip(separator)
+        match = self.createMatcher()
+        state = _ParseState(text, ParserElement._packrat_enabled)
+        try:
+            loc, tokens, names = match(state, skip(state, 0))
+        except _NoMatch:
+            raise ParseException('<string>', text, state.error.loc * 8, state.error)
+        return ParseResults(tokens, names)
+
+    def _parseEntries(self, text):
+        """Parse the text by decoding it with the bdec entries.
+
+        This is much slower than parseString, which matches the text
+        directly."""
+        if isinstance(text, unicode):
+            text = text.encode('ascii')
+
         token_stack = [[]]
         name_stack = [{}]
         for is_starting, name, entry, data, value in self._decode(text, '<string>'):
@@ -276,6 +454,25 @@ class ZeroOrMore(ParserElement):
         item = Choice('item', [entry, end])
         return SequenceOf('items', item, end_entries=[end])
 
+    def _createMatcher(self, separator):
+        match = self.element.createMatcher(separator)
+        def matcher(state, loc):
+            tokens = []
+            names = {}
+            while 1:
+                try:
+                    end, child_tokens, child_names = match(state, loc)
+                except _NoMatch:
+                    break
+                tokens += child_tokens
+                names.update(child_names)
+                if end == loc:
+                    # Don't loop forever on elements that match nothing.
+                    break
+                loc = end
+            return loc, tokens, names
+        return matcher
+
     def __str__(self):
         return '{%s}' % self.element
 
@@ -297,19 +494,20 @@ class Literal(ParserElement):
             result = Sequence('literal', [result, separator.createDecoder(None)])
         return result
 
+    def _createMatcher(self, separator):
+        text = self.text
+        length = len(text)
+        skip = _create_skip(separator)
+        def matcher(state, loc):
+            if not state.text.startswith(text, loc):
+                state.fail(self, loc)
+            return skip(state, loc + length), [text], {}
+        return matcher
+
     def __str__(self):
         return '"%s"' % repr(self.text)[1:-1]
 
 
-def Word(init_chars, body_chars=None):
-    init = MatchFirst([Literal(c) for c in init_chars])
-    if body_chars:
-        body = MatchFirst([Literal(c) for c in body_chars])
-        result = init + ZeroOrMore(body)
-    else:
-        result = OneOrMore(init)
-    return Combine(result)('word')
-
 
 def _check_literals(exprs):
     result = []
@@ -328,6 +526,18 @@ class And(ParserElement):
     def _createEntry(self, separator):
         return Sequence('and', [e.createDecoder(separator) for e in self.exprs])
 
+    def _createMatcher(self, separator):
+        matches = [e.createMatcher(separator) for e in self.exprs]
+        def matcher(state, loc):
+            tokens = []
+            names = {}
+            for match in matches:
+                loc, child_tokens, child_names = match(state, loc)
+                tokens += child_tokens
+                names.update(child_names)
+            return loc, tokens, names
+        return matcher
+
     def __add__(self, other):
         if not isinstance(other, ParserElement):
             other = Literal(other)
@@ -346,6 +556,8 @@ class And(ParserElement):
 
 
 class MatchFirst(ParserElement):
+    _should_memoize = True
+
     def __init__(self, exprs):
         ParserElement.__init__(self)
         self.exprs = _check_literals(exprs)
@@ -353,6 +565,17 @@ class MatchFirst(ParserElement):
     def _createEntry(self, separator):
         return Choice('or', [e.createDecoder(separator) for e in self.exprs])
 
+    def _createMatcher(self, separator):
+        matches = [e.createMatcher(separator) for e in self.exprs]
+        def matcher(state, loc):
+            for match in matches:
+                try:
+                    return match(state, loc)
+                except _NoMatch:
+                    pass
+            state.fail(self, loc)
+        return matcher
+
     def __str__(self):
         return '[%s]' % (', '.join(str(e) for e in self.exprs))
 
@@ -379,11 +602,26 @@ class StringEnd(ParserElement):
         length_check = Sequence('end of string:', [], value=LengthResult('data:'), constraints=[Equals(0)])
         return Sequence(None, [data, length_check])
 
+    def _createMatcher(self, separator):
+        def matcher(state, loc):
+            if loc != len(state.text):
+                state.fail(self, loc)
+            return loc, [], {}
+        return matcher
+
+    def __str__(self):
+        return 'end of string'
+
 
 class NoMatch(ParserElement):
     def _createEntry(self, separator):
         return Sequence(None, [], value=Constant(0), constraints=[Equals(1)])
 
+    def _createMatcher(self, separator):
+        def matcher(state, loc):
+            state.fail(self, loc)
+        return matcher
+
 
 class CharsNotIn(ParserElement):
     def __init__(self, notChars):
@@ -442,6 +680,19 @@ class CharsNotIn(ParserElement):
         result = Sequence('chars not in', children)
         return result
 
+    def _createMatcher(self, separator):
+        not_chars = frozenset(self.notChars)
+        skip = _create_skip(separator)
+        def matcher(state, loc):
+            text = state.text
+            end = loc
+            while end < len(text) and text[end] not in not_chars:
+                end += 1
+            if end == loc:
+                state.fail(self, loc)
+            return skip(state, end), [text[loc:end]], {}
+        return matcher
+
     def __str__(self):
         return '[not in %s]' % repr(self.notChars)
 
@@ -453,6 +704,8 @@ def Suppress(expr):
 
 
 class Forward(ParserElement):
+    _should_memoize = True
+
     def __init__(self):
         ParserElement.__init__(self)
         self.expr = None
@@ -466,6 +719,10 @@ class Forward(ParserElement):
         assert self.expr is not None
         return self.expr.createDecoder(separator)
 
+    def _createMatcher(self, separator):
+        assert self.expr is not None
+        return self.expr.createMatcher(separator)
+
 
 class NotAny(ParserElement):
     def __init__(self, expr):
@@ -483,6 +740,19 @@ class NotAny(ParserElement):
         check = Sequence('check:', [], value=LengthResult('is present'), constraints=[Equals(0)])
         return Sequence('not any:', [is_present, check])
 
+    def _createMatcher(self, separator):
+        match = self.expr.createMatcher(separator)
+        def matcher(state, loc):
+            try:
+                match(state, loc)
+            except _NoMatch:
+                return loc, [], {}
+            state.fail(self, loc)
+        return matcher
+
+    def __str__(self):
+        return 'not %s' % self.expr
+
 
 class SkipTo(ParserElement):
     def __init__(self, expr):
@@ -494,8 +764,47 @@ class SkipTo(ParserElement):
 
     def _createEntry(self, separator):
         end = self.expr.createDecoder(separator)
+
+        def joinSkipped(toks):
+            # Each skipped byte is decoded as a binary token; join them into
+            # a single token of the skipped text (as the matcher does).
+            skipped = 0
+            while skipped < len(toks) and isinstance(toks[skipped], Data):
+                skipped += 1
+            if not skipped:
+                return toks
+            text = ''.join(t.bytes() for t in toks[:skipped])
+            return ParseResults([text] + list(toks[skipped:]), toks._names)
+        self._internal_actions.append(joinSkipped)
         return SequenceOf('skip to', Choice('item', [end, Field('skipped', 8)]), end_entries=[end])
 
+    def _createMatcher(self, separator):
+        match = self.expr.createMatcher(separator)
+        literal = self.expr.text if isinstance(self.expr, Literal) else None
+        def matcher(state, loc):
+            text = state.text
+            start = loc
+            while 1:
+                if literal is not None:
+                    # Jump straight to the next possible match.
+                    loc = text.find(literal, loc)
+                    if loc == -1:
+                        state.fail(self, len(text))
+                try:
+                    end, tokens, names = match(state, loc)
+                    break
+                except _NoMatch:
+                    if loc >= len(text):
+                        state.fail(self, loc)
+                    loc += 1
+            if loc != start:
+                tokens.insert(0, text[start:loc])
+            return end, tokens, names
+        return matcher
+
+    def __str__(self):
+        return 'skip to %s' % self.expr
+
 
 class Combine(ParserElement):
     def __init__(self, expr):
@@ -514,6 +823,50 @@ class Combine(ParserElement):
             result = Sequence('combine', [result, separator.createDecoder(None)])
         return result
 
+    def _createMatcher(self, separator):
+        match = self.expr.createMatcher(None)
+        skip = _create_skip(separator)
+        def matcher(state, loc):
+            loc, tokens, names = match(state, loc)
+            if tokens:
+                tokens = [''.join(tokens)]
+            return skip(state, loc), tokens, {}
+        return matcher
+
+    def __str__(self):
+        return 'combine %s' % self.expr
+
+
+class Word(Combine):
+    def __init__(self, init_chars, body_chars=None):
+        init = MatchFirst([Literal(c) for c in init_chars])
+        if body_chars:
+            body = MatchFirst([Literal(c) for c in body_chars])
+            result = init + ZeroOrMore(body)
+        else:
+            result = OneOrMore(init)
+        Combine.__init__(self, result)
+        self.setName('word')
+        self.initChars = init_chars
+        self.bodyChars = body_chars or init_chars
+
+    def _createMatcher(self, separator):
+        init_chars = frozenset(self.initChars)
+        body_chars = frozenset(self.bodyChars)
+        skip = _create_skip(separator)
+        def matcher(state, loc):
+            text = state.text
+            if loc >= len(text) or text[loc] not in init_chars:
+                state.fail(self, loc)
+            end = loc + 1
+            while end < len(text) and text[end] in body_chars:
+                end += 1
+            return skip(state, end), [text[loc:end]], {}
+        return matcher
+
+    def __str__(self):
+        return 'word %s' % repr(self.bodyChars)
+
 def srange(text):
     assert text[0] == '[' and text[-1] == ']'
     text = text[1:-1]
@@ -178,3 +178,46 @@ class TestParsing(unittest.TestCase):
         number_list = delimitedList(number, ',')
         expr = number_list + StringEnd()
         self.assertEqual(['232', '777', '899'], expr.parseString('232, 777,899 ').asList())
+
+    def test_skip_to(self):
+        a = Literal('start') + SkipTo('end') + StringEnd()
+        self.assertEqual(['start', 'a b c ', 'end'], a.parseString('start a b c end').asList())
+        self.assertRaises(ParseException, a.parseString, 'start a b c')
+
+    def test_packrat(self):
+        calls = []
+        def count(t):
+            calls.append(t[0])
+            return t
+        value = (Word(nums) | Word(alphas)).addParseAction(count)
+        expr = (value + 'a') | (value + 'b')
+        ParserElement.enablePackrat()
+        try:
+            self.assertEqual(['12', 'b'], expr.parseString('12 b').asList())
+        finally:
+            ParserElement._packrat_enabled = False
+        self.assertEqual(['12'], calls)
+
+    def test_error_location(self):
+        a = Word(alphas) + Word(nums) + StringEnd()
+        try:
+            a.parseString('abcd\n1234 efgh')
+            self.fail('Parse should have failed!')
+        except ParseException, ex:
+            self.assertEqual(2, ex.lineno)
+            self.assertEqual(5, ex.col)
+
+    def test_decoder_matches_parser(self):
+        number = Word(nums).setParseAction(lambda t:int(t[0]))
+        expr = Forward()
+        expr << (number | Suppress('(') + ZeroOrMore(expr) + Suppress(')'))
+        text = '(1 (2 3) ((4)) 5)'
+        self.assertEqual([1, 2, 3, 4, 5], expr.parseString(text).asList())
+        self.assertEqual([1, 2, 3, 4, 5], expr._parseEntries(text).asList())
+
+    def test_decoder_skip_to_matches_parser(self):
+        a = Literal('start') + SkipTo(Word(nums)('number')) + 'end'
+        text = 'start a b 12 end'
+        self.assertEqual(['start', 'a b ', '12', 'end'], a.parseString(text).asList())
+        self.assertEqual(['start', 'a b ', '12', 'end'], a._parseEntries(text).asList())
+        self.assertEqual('12', a._parseEntries(text).number)
@@ -150,7 +150,6 @@
     *${get_reference_name(entry, EntryValueType)} = ${value};
     %endif
   %elif entry.format == Field.TEXT:
-    <% local_vars.append(('unsigned int', 'i')) %>
     ${value}.length = ${settings.value(entry, entry.length)} / 8;
     ${value}.buffer = (char*)malloc(${value}.length + 1);
     if (${value}.buffer == 0)
@@ -158,12 +157,8 @@
         return 0;
     }
     ${value}.buffer[${value}.length] = 0;
-    for (i = 0; i < ${value}.length; ++i)
-    {
-        ${value}.buffer[i] = decode_integer(buffer, 8);
-    }
+    decode_bytes(buffer, (unsigned char*)${value}.buffer, ${value}.length);
   %elif entry.format == Field.HEX:
-    <% local_vars.append(('unsigned int', 'i')) %>
     assert((${settings.value(entry, entry.length)}) % 8 == 0);
     ${value}.length = ${settings.value(entry, entry.length)} / 8;
     ${value}.buffer = (unsigned char*)malloc(${value}.length);
@@ -171,21 +166,23 @@
     {
         return 0;
     }
-    for (i = 0; i < ${value}.length; ++i)
-    {
-        ${value}.buffer[i] = decode_integer(buffer, 8);
-    }
+    decode_bytes(buffer, ${value}.buffer, ${value}.length);
   %elif entry.format == Field.BINARY:
     ${value}.start_bit = buffer->start_bit;
     ${value}.num_bits = ${settings.value(entry, entry.length)};
-    <% local_vars.append(('unsigned int', 'numBytes')) %>
-    numBytes = (buffer->start_bit + buffer->num_bits + 7) / 8;
-    ${value}.buffer = (unsigned char*)malloc(numBytes);
+#ifdef BDEC_COPY_BINARY_FIELDS
+    /* Copy the field's data, so the data being decoded can be freed. */
+    ${value}.buffer = (unsigned char*)malloc((${value}.start_bit + ${value}.num_bits + 7) / 8);
     if (${value}.buffer == 0)
     {
         return 0;
     }
-    memcpy(${value}.buffer, buffer->buffer, numBytes);
+    memcpy(${value}.buffer, buffer->buffer, (${value}.start_bit + ${value}.num_bits + 7) / 8);
+#else
+    /* Binary fields refer to the data being decoded, so it must not be
+       freed while the field is in use. */
+    ${value}.buffer = buffer->buffer;
+#endif
     buffer->start_bit += ${value}.num_bits;
     buffer->buffer += buffer->start_bit / 8;
     buffer->start_bit %= 8;
@@ -410,7 +407,9 @@ ${static}void ${settings.free_name(entry)}(${settings.ctype(entry)}* value)
     %elif entry.format == Field.HEX:
     free(value->buffer);
     %elif entry.format == Field.BINARY:
+#ifdef BDEC_COPY_BINARY_FIELDS
     free(value->buffer);
+#endif
     %endif
   %elif isinstance(entry, Sequence):
     %for i, child in enumerate(entry.children):
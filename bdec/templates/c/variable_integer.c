@@ -44,6 +44,7 @@
 
 #include <assert.h>
 #include <stdio.h>
+#include <string.h>
 #include "variable_integer.h"
 
 unsigned int get_integer(const BitBuffer* buffer)
@@ -60,87 +61,29 @@ uint64_t get_long_integer(const BitBuffer* buffer)
     return decode_long_integer(&temp, temp.num_bits);
 }
 
-unsigned int decode_integer(BitBuffer* buffer, int num_bits)
+void decode_bytes(BitBuffer* buffer, unsigned char* dest, unsigned int length)
 {
-    unsigned int result = 0;
-    unsigned char mask;
-    int bits_used;
-    unsigned int unused_trailing_bits;
-    unsigned int data;
-    while (num_bits > 0)
-    {
-        assert(buffer->num_bits > 0);
-
-        /* We need to mask the higher and lower bits we don't care about */
-        mask = 0xFF >> buffer->start_bit;
-        if (buffer->start_bit + num_bits > 8)
-        {
-            bits_used = 8 - buffer->start_bit;
-        }
-        else
-        {
-            bits_used = num_bits;
-        }
-        unused_trailing_bits = 8 - bits_used - buffer->start_bit;
-        data = (buffer->buffer[0] & mask) >> unused_trailing_bits;
-
-        buffer->start_bit += bits_used;
-        buffer->num_bits -= bits_used;
-        assert(buffer->start_bit <= 8);
-        if (buffer->start_bit == 8)
-        {
-            ++buffer->buffer;
-            buffer->start_bit = 0;
-        }
-        num_bits -= bits_used;
-        result |= data << num_bits;
-    }
-    return result;
-}
-
-uint64_t decode_long_integer(BitBuffer* buffer, int num_bits)
-{
-    uint64_t result = 0;
-    while (num_bits > 0)
-    {
-        int size = num_bits > 32 ? 32 : num_bits;
-        result <<= size;
-        result |= decode_integer(buffer, size);
-        num_bits -= size;
-    }
-    return result;
-}
-
-unsigned int decode_little_endian_integer(BitBuffer* buffer, int num_bits)
-{
-    int i;
-    unsigned int result = 0;
-
-    /* Little endian conversion only works for fields that are a multiple
-       of 8 bits. */
-    assert(num_bits % 8  == 0);
-    for (i = 0; i < num_bits / 8; ++i)
+    unsigned int i;
+    unsigned int shift = buffer->start_bit;
+    assert(buffer->num_bits >= length * 8);
+    if (shift == 0)
     {
-        result |= decode_integer(buffer, 8) << (i * 8);
+        /* The data is byte aligned, so we can copy it directly. */
+        memcpy(dest, buffer->buffer, length);
     }
-    return result;
-}
-
-uint64_t decode_long_little_endian_integer(BitBuffer* buffer, int num_bits)
-{
-    int i;
-    uint64_t result = 0;
-    uint64_t value;
-
-    /* Little endian conversion only works for fields that are a multiple
-       of 8 bits. */
-    assert(num_bits % 8  == 0);
-    for (i = 0; i < num_bits / 8; ++i)
+    else
     {
-        value = decode_integer(buffer, 8);
-        result |= value << (i * 8);
+        /* Every byte straddles two bytes of the input. The last byte of the
+           input holds the trailing bits of the final byte, so it is always
+           present. */
+        for (i = 0; i < length; ++i)
+        {
+            dest[i] = (unsigned char)((buffer->buffer[i] << shift) |
+                    (buffer->buffer[i + 1] >> (8 - shift)));
+        }
     }
-    return result;
+    buffer->buffer += length;
+    buffer->num_bits -= length * 8;
 }
 
 void print_escaped_string(const Text* text)
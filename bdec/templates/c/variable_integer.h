@@ -44,22 +44,145 @@
 #ifndef VARIABLE_INTEGER_HEADER_FILE
 #define VARIABLE_INTEGER_HEADER_FILE
 
+#include <assert.h>
 #include "buffer.h"
 
 #ifdef __cplusplus
 extern "C" {
 #endif
 
+/* Inline functions aren't part of c89, but gcc supports them as an
+   extension. */
+#if defined(__cplusplus) || (defined(__STDC_VERSION__) && __STDC_VERSION__ >= 199901L)
+#define BDEC_INLINE static inline
+#elif defined(__GNUC__)
+#define BDEC_INLINE static __inline__
+#else
+#define BDEC_INLINE static
+#endif
+
 /* Convert a buffer to a big endian integer */
 unsigned int get_integer(const BitBuffer* buffer);
 uint64_t get_long_integer(const BitBuffer* buffer);
 
-/* Both functions decode an integer from the buffer. There
-   must be enough data available. */
-unsigned int decode_integer(BitBuffer* buffer, int num_bits);
-uint64_t decode_long_integer(BitBuffer* buffer, int num_bits);
-unsigned int decode_little_endian_integer(BitBuffer* buffer, int num_bits);
-uint64_t decode_long_little_endian_integer(BitBuffer* buffer, int num_bits);
+/* Decode up to 57 bits from the buffer as a big endian integer. The
+   bytes are read into a 64 bit accumulator (57 bits is the most that will
+   fit for any start bit). There must be enough data available. */
+BDEC_INLINE uint64_t decode_bits(BitBuffer* buffer, int num_bits)
+{
+    const unsigned char* data = buffer->buffer;
+    unsigned int end_bit = buffer->start_bit + num_bits;
+    unsigned int i;
+    uint64_t result = 0;
+
+    assert(num_bits <= 57);
+    assert(buffer->num_bits >= (unsigned int)num_bits);
+    if (num_bits <= 0)
+    {
+        return 0;
+    }
+    if (buffer->start_bit == 0 && num_bits == 8)
+    {
+        result = data[0];
+    }
+    else if (buffer->start_bit == 0 && num_bits == 16)
+    {
+        /* Compilers turn these byte aligned reads into a single (byte
+           swapped) load. */
+        result = ((unsigned int)data[0] << 8) | data[1];
+    }
+    else if (buffer->start_bit == 0 && num_bits == 32)
+    {
+        result = ((uint32_t)data[0] << 24) | ((uint32_t)data[1] << 16) |
+            ((uint32_t)data[2] << 8) | data[3];
+    }
+    else
+    {
+        for (i = 0; i < (end_bit + 7) / 8; ++i)
+        {
+            result = (result << 8) | data[i];
+        }
+        /* Drop the unused trailing bits, then mask the leading bits. */
+        result >>= (8 - end_bit % 8) % 8;
+        result &= (((uint64_t)1) << num_bits) - 1;
+    }
+    buffer->buffer += end_bit / 8;
+    buffer->start_bit = end_bit % 8;
+    buffer->num_bits -= num_bits;
+    return result;
+}
+
+/* Decode integers from the buffer. There must be enough data available. */
+BDEC_INLINE uint64_t decode_long_integer(BitBuffer* buffer, int num_bits)
+{
+    const unsigned char* data = buffer->buffer;
+    uint64_t result = 0;
+    int size;
+
+    if (buffer->start_bit == 0 && num_bits == 64)
+    {
+        assert(buffer->num_bits >= 64);
+        result = ((uint64_t)data[0] << 56) | ((uint64_t)data[1] << 48) |
+            ((uint64_t)data[2] << 40) | ((uint64_t)data[3] << 32) |
+            ((uint64_t)data[4] << 24) | ((uint64_t)data[5] << 16) |
+            ((uint64_t)data[6] << 8) | data[7];
+        buffer->buffer += 8;
+        buffer->num_bits -= 64;
+        return result;
+    }
+    while (num_bits > 0)
+    {
+        size = num_bits > 32 ? 32 : num_bits;
+        result = (result << size) | decode_bits(buffer, size);
+        num_bits -= size;
+    }
+    return result;
+}
+
+BDEC_INLINE unsigned int decode_integer(BitBuffer* buffer, int num_bits)
+{
+    if (num_bits <= 57)
+    {
+        return (unsigned int)decode_bits(buffer, num_bits);
+    }
+    return (unsigned int)decode_long_integer(buffer, num_bits);
+}
+
+/* Little endian conversion only works for fields that are a multiple of 8
+   bits. */
+BDEC_INLINE uint64_t decode_long_little_endian_integer(BitBuffer* buffer, int num_bits)
+{
+    const unsigned char* data = buffer->buffer;
+    uint64_t result = 0;
+    int i;
+
+    assert(num_bits % 8  == 0);
+    if (buffer->start_bit == 0)
+    {
+        assert(buffer->num_bits >= (unsigned int)num_bits);
+        for (i = num_bits / 8 - 1; i >= 0; --i)
+        {
+            result = (result << 8) | data[i];
+        }
+        buffer->buffer += num_bits / 8;
+        buffer->num_bits -= num_bits;
+        return result;
+    }
+    for (i = 0; i < num_bits / 8; ++i)
+    {
+        result |= decode_bits(buffer, 8) << (i * 8);
+    }
+    return result;
+}
+
+BDEC_INLINE unsigned int decode_little_endian_integer(BitBuffer* buffer, int num_bits)
+{
+    return (unsigned int)decode_long_little_endian_integer(buffer, num_bits);
+}
+
+/* Decode 'length' bytes from the buffer into 'dest'. There must be enough
+   data available. */
+void decode_bytes(BitBuffer* buffer, unsigned char* dest, unsigned int length);
 
 /* Encode a big endian integer */
 int encode_big_endian_integer(unsigned int value, unsigned int num_bits, struct EncodedData* result);
@@ -206,6 +206,21 @@ class TestData(unittest.TestCase):
 
         self.assertRaises(dt.NotEnoughDataError, int, data.pop(1))
 
+    def test_release_non_seeking_file(self):
+        data = dt.Data(NonSeekable('abcdef'))
+        self.assertEqual('ab', data.pop(16).text('ascii'))
+        data.release()
+        self.assertEqual('cd', data.pop(16).text('ascii'))
+        # Release data that hasn't been read yet.
+        data.pop(8)
+        data.release()
+        self.assertEqual('f', data.bytes())
+
+    def test_is_stream(self):
+        self.assertFalse(dt.Data('abc').is_stream())
+        self.assertFalse(dt.Data(NonSeekable('abc')).pop(8).is_stream())
+        self.assertTrue(dt.Data(dt.StreamBuffer()).pop(8).is_stream())
+
     def test_invalid_binary_text(self):
         try:
             dt.Data.from_binary_text('abcd')
@@ -260,3 +275,19 @@ class TestData(unittest.TestCase):
         a = dt.Data('\x01', 7, 8)
         b = dt.Data('\x0f\xff', 4, 16)
         self.assertEqual('11111 11111111', (a + b).get_binary_text())
+
+    def test_join(self):
+        self.assertEqual("chicken little", dt.Data.join([dt.Data("chicken "), dt.Data("little")]).bytes())
+        self.assertEqual('\x7c', dt.Data.join([dt.Data('\x70', 0, 4), dt.Data('\x0c', 4, 8)]).bytes())
+        self.assertEqual(dt.Data(), dt.Data.join([]))
+
+    def test_join_unaligned(self):
+        items = [dt.Data('\x01', 7, 8), dt.Data('\x0f\xff', 4, 16),
+                dt.Data('abcdefghij', 3, 77), dt.Data('', 4, 4), dt.Data('\x00', 5, 8)]
+        expected = reduce(lambda a, b: a + b, items)
+        self.assertEqual(expected, dt.Data.join(items))
+        self.assertEqual(len(expected), len(dt.Data.join(items)))
+
+    def test_unaligned_integer(self):
+        self.assertEqual(0x3ff, int(dt.Data('\x0f\xff\xc0', 6, 16)))
+        self.assertEqual(0x1f, int(dt.Data('\xf8', 0, 5)))
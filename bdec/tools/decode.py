@@ -49,13 +49,24 @@ import getopt
 
 import bdec
 import bdec.data as dt
+from bdec.decode import Decoder
+import bdec.decode.parallel as parallel
+from bdec.decode.profile import Profiler
 import bdec.inspect.param
+import bdec.output.columnar as columnar
+import bdec.output.jsonout as jsonout
 import bdec.output.xmlout as xmlout
 from bdec.spec import load_specs
 from bdec.spec.xmlspec import dumps
 
+XML = 'xml'
+JSON = 'json'
+NDJSON = 'ndjson'
+CSV = 'csv'
+COLUMNS = 'columns'
+
 def usage(program):
-    print 'Decode standard input to xml given a bdec specification.'
+    print 'Decode standard input to xml (or json) given a bdec specification.'
     print 'Usage:'
     print '   %s [options] <spec_filename>' % program
     print
@@ -64,13 +75,28 @@ def usage(program):
     print
     print 'Options:'
     print '  -f <filename>     Decode from filename instead of stdin.'
+    print '  --format=<format> The output format; one of xml (the default), json,'
+    print '                    ndjson (one line of json per record; implies --records),'
+    print '                    csv, or columns (see bdec.output.columnar). When decoding'
+    print '                    records as json, the records are written as a json array.'
+    print '                    The csv and columns formats write a row for each item of'
+    print '                    the first sequenceof, or for each record.'
     print '  -h, --help        Print this help.'
+    print '  --jobs=<n>        Decode the records in the input file (see -f) using n'
+    print '                    processes. Implies --records.'
     print '  -l                Log status messages.'
     print '  --main=<name>     Specify the entry to be used as the decoder.'
+    print '  --profile         Print the entries that took the longest to decode, and'
+    print '                    the choices that needed trial decodes, to stderr.'
     print '  -q                Quiet output. Only errors will be printed to stderr.'
+    print '  --records         Decode the input as a stream of records, outputting'
+    print '                    each record as soon as it is decoded.'
     print '  --remove-unused   Remove any entries that are not referenced from the main'
     print '                    entry.'
     print '  -S                Print an xml representation of the specification.'
+    print '  --select=<path>   Only output the entry with the given path of names'
+    print '                    separated by \'.\' (eg: png.chunks.chunk.type). May be'
+    print '                    used multiple times.'
     print '  --verbose         Include hidden entries and raw data in the decoded output.'
     print '  -V                Print the version of the bdec compiler.'
 
@@ -80,28 +106,51 @@ def _parse_args():
     main_spec = None
     should_remove_unused = False
     should_print_spec = False
+    is_records = False
+    jobs = None
+    should_profile = False
+    format = XML
+    select = None
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'f:hlqSV', ['help', 'main=', 'remove-unused', 'verbose'])
+        opts, args = getopt.getopt(sys.argv[1:], 'f:hlqSV', ['format=', 'help', 'jobs=', 'main=', 'profile', 'records', 'remove-unused', 'select=', 'verbose'])
     except getopt.GetoptError, ex:
         sys.exit("%s\nSee '%s -h' for correct usage." % (ex, sys.argv[0]))
     for opt, arg in opts:
         if opt == '-f':
             binary = open(arg, 'rb')
+        elif opt == '--format':
+            if arg not in [XML, JSON, NDJSON, CSV, COLUMNS]:
+                sys.exit("Unknown output format '%s'!" % arg)
+            format = arg
+            if format == NDJSON:
+                is_records = True
         elif opt in ['-h', '--help']:
             usage(sys.argv[0])
             sys.exit(0)
+        elif opt == '--jobs':
+            try:
+                jobs = int(arg)
+            except ValueError:
+                sys.exit("Invalid number of jobs '%s'!" % arg)
+            is_records = True
         elif opt == '--main':
             main_spec = arg
+        elif opt == '--profile':
+            should_profile = True
         elif opt == '-q':
             verbose = 0
         elif opt == '--verbose':
             verbose = 2
+        elif opt == '--records':
+            is_records = True
         elif opt == '--remove-unused':
             should_remove_unused = True
         elif opt == "-l":
             logging.basicConfig(level=logging.INFO)
         elif opt == '-S':
             should_print_spec = True
+        elif opt == '--select':
+            select = (select or []) + [arg]
         elif opt == '-V':
             print bdec.__version__
             sys.exit(0)
@@ -110,14 +159,88 @@ def _parse_args():
 
     if len(args) == 0:
         sys.exit("Missing arguments! See '%s -h' for more info." % sys.argv[0])
+    if jobs is not None and binary is sys.stdin:
+        sys.exit("Decoding with multiple jobs requires an input file (see -f).")
+    if jobs is not None and should_profile:
+        sys.exit("Profiling isn't supported when decoding with multiple jobs.")
+    if jobs is not None and select is not None:
+        sys.exit("Selecting entries isn't supported when decoding with multiple jobs.")
+    if jobs is not None and format in [CSV, COLUMNS]:
+        sys.exit("The %s format isn't supported when decoding with multiple jobs." % format)
+
+    return (main_spec, args, binary, verbose, should_remove_unused, should_print_spec, is_records, jobs, should_profile, format, select)
+
+def _write(items, verbose, format, columns):
+    if columns is not None:
+        columns.add(items)
+    elif format == XML:
+        xmlout.to_file(items, sys.stdout, verbose=(verbose==2))
+    else:
+        jsonout.to_file(items, sys.stdout, verbose=(verbose==2))
+
+def _column_builder(format, is_records):
+    if format == CSV:
+        writer = columnar.CsvWriter(sys.stdout)
+    elif format == COLUMNS:
+        writer = columnar.BinaryWriter(sys.stdout)
+    else:
+        return None
+    return columnar.ColumnBuilder(writer, is_records=is_records)
+
+def _decode_records(decoder, data, verbose, format, columns):
+    is_first = True
+    for items in decoder.iter_records(data):
+        if verbose != 0:
+            if format == JSON:
+                sys.stdout.write('[' if is_first else ',')
+            _write(items, verbose, format, columns)
+            if columns is None:
+                sys.stdout.flush()
+        is_first = False
+    if verbose != 0 and format == JSON:
+        sys.stdout.write('[]\n' if is_first else ']\n')
 
-    return (main_spec, args, binary, verbose, should_remove_unused, should_print_spec)
+def _decode_parallel(decoder, specs, main_spec, should_remove_unused, binary, jobs, verbose, format):
+    offsets = list(decoder.skim_records(dt.Data(binary)))
+    records = parallel.decode(specs, binary.name, offsets, jobs,
+            parallel.XML if format == XML else parallel.JSON, main_spec,
+            should_remove_unused, verbose==2)
+    is_first = True
+    try:
+        for record in records:
+            if verbose != 0:
+                if format == JSON:
+                    sys.stdout.write('[' if is_first else ',')
+                sys.stdout.write(record)
+                sys.stdout.flush()
+            is_first = False
+    except parallel.RecordDecodeError, ex:
+        print
+        sys.exit(str(ex))
+    if verbose != 0 and format == JSON:
+        sys.stdout.write('[]\n' if is_first else ']\n')
 
+def _exit_decode_error(ex, lookup):
+    try:
+        (filename, line_number, column_number) = lookup[ex.entry]
+    except KeyError:
+        (filename, line_number, column_number) = ('unknown', 0, 0)
+
+    # We include an extra new line, as the xml is unlikely to have finished
+    # on a new line (issue164).
+    print
+    sys.exit("%s[%i]: %s" % (filename, line_number, str(ex)))
 
 def main():
-    main_spec, specs, binary, verbose, should_remove_unused, should_print_spec = _parse_args()
+    main_spec, specs, binary, verbose, should_remove_unused, should_print_spec, is_records, jobs, should_profile, format, select = _parse_args()
+    specs = [(s, None, None) for s in specs]
     try:
-        decoder, common, lookup = load_specs([(s, None, None) for s in specs], main_spec, should_remove_unused)
+        if jobs is not None:
+            # Load the specification through the parallel decoder's cache, so
+            # the worker processes can re-use it.
+            decoder, common, lookup = parallel.load_specs(specs, main_spec, should_remove_unused)
+        else:
+            decoder, common, lookup = load_specs(specs, main_spec, should_remove_unused)
     except bdec.spec.LoadError, ex:
         sys.exit(str(ex))
 
@@ -125,23 +248,45 @@ def main():
         print dumps(decoder, common)
         return
 
+    if jobs is not None:
+        try:
+            _decode_parallel(Decoder(decoder), specs, main_spec,
+                    should_remove_unused, binary, jobs, verbose, format)
+        except bdec.DecodeError, ex:
+            _exit_decode_error(ex, lookup)
+        return
+
+    columns = None
+    if verbose != 0:
+        columns = _column_builder(format, is_records)
+    profiler = None
+    if should_profile:
+        profiler = Profiler(lookup)
+
     data = dt.Data(binary)
     try:
-        if verbose == 0:
-            for item in decoder.decode(data):
-                pass
+        if is_records:
+            _decode_records(Decoder(decoder, profiler, select), data, verbose, format, columns)
         else:
-            xmlout.to_file(decoder.decode(data), sys.stdout, verbose=(verbose==2))
+            if profiler is not None or select is not None:
+                items = Decoder(decoder, profiler, select).decode(data, {}, None)
+            else:
+                items = decoder.decode(data)
+            if verbose == 0:
+                for item in items:
+                    pass
+            else:
+                _write(items, verbose, format, columns)
     except bdec.DecodeError, ex:
-        try:
-            (filename, line_number, column_number) = lookup[ex.entry]
-        except KeyError:
-            (filename, line_number, column_number) = ('unknown', 0, 0)
-
-        # We include an extra new line, as the xml is unlikely to have finished
-        # on a new line (issue164).
-        print
-        sys.exit("%s[%i]: %s" % (filename, line_number, str(ex)))
+        _exit_decode_error(ex, lookup)
+    finally:
+        if columns is not None:
+            columns.close()
+        if profiler is not None:
+            sys.stdout.flush()
+            profiler.report(sys.stderr)
+            sys.stderr.write('\n')
+            profiler.report_choices(sys.stderr)
 
     try:
         # Test to see if we have data undecoded...
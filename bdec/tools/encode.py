@@ -76,9 +76,9 @@ def main():
         sys.exit(str(ex))
 
     if options.filename:
-        xml = file(options.filename, 'rb').read()
+        xml = file(options.filename, 'rb')
     else:
-        xml = sys.stdin.read()
+        xml = sys.stdin
 
     try:
         binary = xmlout.encode(protocol, xml).bytes()